@@ -26,7 +26,7 @@ from .injectgcode import injector, injector_edit
 
 from pyglet.gl import glPushMatrix, glPopMatrix, \
     glTranslatef, glRotatef, glScalef, glMultMatrixd, \
-    glGetDoublev, GL_MODELVIEW_MATRIX, GLdouble
+    glGetDoublev, GL_MODELVIEW_MATRIX
 
 from .gviz import GvizBaseFrame
 
@@ -161,21 +161,26 @@ class GcodeViewPanel(wxGLPanel):
             # May need to lock init() and draw_objects() together
             # if not obj.model.initialized:
             #     continue
-            glPushMatrix()
-            glTranslatef(*(obj.offsets))
-            glRotatef(obj.rot, 0.0, 0.0, 1.0)
-            glTranslatef(*(obj.centeroffset))
-            glScalef(*obj.scale)
+            # Objects are usually drawn in place, skip the matrix work then
+            transformed = obj.rot or any(obj.offsets) or any(obj.centeroffset) \
+                or any(s != 1 for s in obj.scale)
+            if transformed:
+                glPushMatrix()
+                glTranslatef(*(obj.offsets))
+                glRotatef(obj.rot, 0.0, 0.0, 1.0)
+                glTranslatef(*(obj.centeroffset))
+                glScalef(*obj.scale)
 
             obj.model.display()
-            glPopMatrix()
+            if transformed:
+                glPopMatrix()
         glPopMatrix()
 
     # ==========================================================================
     # Utils
     # ==========================================================================
     def get_modelview_mat(self, local_transform):
-        mvmat = (GLdouble * 16)()
+        mvmat = self.modelview_mat
         if local_transform:
             glPushMatrix()
             # Rotate according to trackball
@@ -28,14 +28,16 @@ from ctypes import sizeof
 from pyglet.gl import glPushMatrix, glPopMatrix, glTranslatef, \
     glGenLists, glNewList, GL_COMPILE, glEndList, glCallList, \
     GL_ELEMENT_ARRAY_BUFFER, GL_UNSIGNED_INT, GL_TRIANGLES, GL_LINE_LOOP, \
-    GL_ARRAY_BUFFER, GL_STATIC_DRAW, glColor4f, glVertex3f, \
-    glBegin, glEnd, GL_LINES, glEnable, glDisable, glGetFloatv, \
-    GL_LINE_SMOOTH, glLineWidth, GL_LINE_WIDTH, GLfloat, GL_FLOAT, GLuint, \
+    GL_ARRAY_BUFFER, GL_STATIC_DRAW, GL_DYNAMIC_DRAW, glColor4f, glVertex3f, \
+    glBegin, glEnd, GL_LINES, glEnable, glDisable, \
+    GL_LINE_SMOOTH, glLineWidth, GLfloat, GL_FLOAT, GLuint, \
     glVertexPointer, glColorPointer, glDrawArrays, glDrawRangeElements, \
     glEnableClientState, glDisableClientState, GL_VERTEX_ARRAY, GL_COLOR_ARRAY, \
     GL_FRONT_AND_BACK, GL_FRONT, glMaterialfv, GL_SPECULAR, GL_EMISSION, \
     glColorMaterial, GL_AMBIENT_AND_DIFFUSE, glMaterialf, GL_SHININESS, \
-    GL_NORMAL_ARRAY, glNormalPointer, GL_LIGHTING, glColor3f
+    GL_NORMAL_ARRAY, glNormalPointer, GL_LIGHTING, glColor3f, \
+    glPushAttrib, glPopAttrib, GL_LINE_BIT, GL_UNSIGNED_BYTE, GL_LINE_STRIP, \
+    glShadeModel, GL_FLAT, GL_LIGHTING_BIT, GL_BYTE
 from pyglet.graphics.vertexbuffer import create_buffer, VertexBufferObject
 
 from printrun.utils import install_locale
@@ -51,12 +53,60 @@ def compile_display_list(func, *options):
     glEndList()
     return display_list
 
-def numpy2vbo(nparray, target = GL_ARRAY_BUFFER, usage = GL_STATIC_DRAW, use_vbos = True):
+def numpy2vbo(nparray, target = GL_ARRAY_BUFFER, usage = GL_STATIC_DRAW, use_vbos = True, vbo = None):
+    # Re-specify the storage of an existing buffer object rather than
+    # deleting it and generating a new one: the driver can orphan the old
+    # storage without waiting for draws still using it
+    if isinstance(vbo, VertexBufferObject):
+        vbo.size = nparray.nbytes
+        vbo.set_data(nparray.ctypes.data)
+        return vbo
+    if vbo is not None:
+        vbo.delete()
     vbo = create_buffer(nparray.nbytes, target = target, usage = usage, vbo = use_vbos)
     vbo.bind()
     vbo.set_data(nparray.ctypes.data)
     return vbo
 
+def append2vbo(nparray, length, uploaded, vbo, target = GL_ARRAY_BUFFER, use_vbos = True):
+    """
+    Upload the first length items of an array which is being filled
+    progressively. The buffer is sized for the whole array, so that when it
+    is kept, only the items from uploaded to length need to be sent.
+    """
+    if vbo is None or vbo.size != nparray.nbytes:
+        if vbo is not None:
+            vbo.delete()
+        vbo = create_buffer(nparray.nbytes, target = target, usage = GL_DYNAMIC_DRAW, vbo = use_vbos)
+        uploaded = 0
+    if length > uploaded:
+        itemsize = nparray.itemsize
+        vbo.set_data_region(nparray[uploaded:length].ctypes.data,
+                            uploaded * itemsize, (length - uploaded) * itemsize)
+    return vbo
+
+def grow_array(nparray, size, exact = False):
+    """
+    Grow nparray in place so that it holds at least size items. Unless
+    exact is set, the capacity is at least doubled, so that repeated growing
+    while filling a buffer costs amortized constant time per item.
+    """
+    if nparray.size < size:
+        if not exact:
+            size = max(size, 2 * nparray.size)
+        nparray.resize(size, refcheck = False)
+
+def shared_view(value):
+    """
+    Return a read-only view of numpy arrays, so that model copies share the
+    loaded data without being able to modify it. Other values are returned
+    unchanged.
+    """
+    if isinstance(value, numpy.ndarray):
+        value = value.view()
+        value.flags.writeable = False
+    return value
+
 def triangulate_rectangle(i1, i2, i3, i4):
     return [i1, i4, i3, i3, i2, i1]
 
@@ -65,10 +115,18 @@ def triangulate_box(i1, i2, i3, i4,
     return [i1, i2, j2, j2, j1, i1, i2, i3, j3, j3, j2, i2,
             i3, i4, j4, j4, j3, i3, i4, i1, j1, j1, j4, i4]
 
+# Triangle indices for consecutive vertices, to be offset by the index of the
+# first vertex
+RECTANGLE_INDICES = numpy.array(triangulate_rectangle(0, 1, 2, 3), dtype = GLuint)
+CAP_INDICES = numpy.array(triangulate_rectangle(3, 2, 1, 0), dtype = GLuint)
+BOX_INDICES = numpy.array(triangulate_box(0, 1, 2, 3, 4, 5, 6, 7), dtype = GLuint)
+
 class BoundingBox:
     """
     A rectangular box (cuboid) enclosing a 3D model, defined by lower and upper corners.
     """
+    __slots__ = ('upper_corner', 'lower_corner')
+
     def __init__(self, upper_corner, lower_corner):
         self.upper_corner = upper_corner
         self.lower_corner = lower_corner
@@ -93,6 +151,11 @@ class Platform:
     """
     Platform on which models are placed.
     """
+    __slots__ = ('light', 'circular', 'width', 'depth', 'height',
+                 'xoffset', 'yoffset', 'zoffset', 'grid',
+                 'color_grads_minor', 'color_grads_interm', 'color_grads_major',
+                 'grid_vertices', 'grid_colors', 'outline_vertices',
+                 'outline_color', 'grid_pointers', 'initialized', 'loaded', 'display_list')
 
     def __init__(self, build_dimensions, light = False, circular = False, grid = (1, 10)):
         self.light = light
@@ -109,6 +172,12 @@ class Platform:
         self.color_grads_interm = (0xaf / 255, 0xdf / 255, 0x5f / 255, 0.2)
         self.color_grads_major = (0xaf / 255, 0xdf / 255, 0x5f / 255, 0.33)
 
+        self.grid_vertices = None
+        self.grid_colors = None
+        self.outline_vertices = None
+        self.outline_color = self.color_grads_major
+        self.grid_pointers = None
+
         self.initialized = False
         self.loaded = True
 
@@ -116,56 +185,92 @@ class Platform:
         self.display_list = compile_display_list(self.draw)
         self.initialized = True
 
+    def _build_grid(self):
+        """
+        Compute the grid lines once so that they can be drawn with a single
+        glDrawArrays call instead of one glVertex call per vertex.
+        """
+        def grid_lines(positions, starts, ends):
+            # Classify all the lines at once, light platforms skip the
+            # minor ones
+            major = positions % self.grid[1] == 0
+            interm = ~major & (positions % (self.grid[1] // 2) == 0)
+            keep = major | interm if self.light else numpy.ones(len(positions), dtype = bool)
+            lines = numpy.empty((numpy.count_nonzero(keep), 2, 3), dtype = GLfloat)
+            lines[:, 0] = starts[keep]
+            lines[:, 1] = ends[keep]
+            line_colors = numpy.empty((len(lines), 2, 4), dtype = GLfloat)
+            line_colors[:] = self.color_grads_minor
+            line_colors[interm[keep]] = self.color_grads_interm
+            line_colors[major[keep]] = self.color_grads_major
+            return lines, line_colors
+
+        def points(x, y):
+            x, y = numpy.broadcast_arrays(x, y)
+            xy = numpy.zeros((len(x), 3))
+            xy[:, 0] = x
+            xy[:, 1] = y
+            return xy
+
+        xs = numpy.arange(0, int(math.ceil(self.width + 1)), self.grid[0])
+        ys = numpy.arange(0, int(math.ceil(self.depth + 1)), self.grid[0])
+        if self.circular:
+            # Lines past the edge of the platform would not cross the circle
+            xs = xs[xs <= self.width]
+            ys = ys[ys <= self.depth]
+        x_floats = xs.astype(float)
+        y_floats = ys.astype(float)
+        if self.circular:  # Draw a circular grid
+            x = (numpy.cos(numpy.arcsin(2 * x_floats / self.width - 1)) + 1) * self.depth / 2
+            vertical = grid_lines(xs, points(x_floats, self.depth - x), points(x_floats, x))
+
+            x = (numpy.sin(numpy.arccos(2 * y_floats / self.depth - 1)) + 1) * self.width / 2
+            horizontal = grid_lines(ys, points(self.width - x, y_floats), points(x, y_floats))
+
+            angles = numpy.radians(numpy.arange(0, 360))
+            outline = numpy.zeros((360, 3), dtype = GLfloat)
+            outline[:, 0] = (numpy.cos(angles) + 1) * self.width / 2
+            outline[:, 1] = (numpy.sin(angles) + 1) * self.depth / 2
+            self.outline_vertices = outline
+        else:  # Draw a rectangular grid
+            vertical = grid_lines(xs, points(x_floats, 0.0), points(x_floats, self.depth))
+            horizontal = grid_lines(ys, points(0.0, y_floats), points(self.width, y_floats))
+
+        self.grid_vertices = numpy.concatenate((vertical[0], horizontal[0]), axis = None)
+        self.grid_colors = numpy.concatenate((vertical[1], horizontal[1]), axis = None)
+        if len(self.grid_colors):
+            # The outline keeps the colour of the last grid line drawn, as it
+            # did when the grid was drawn vertex by vertex
+            self.outline_color = tuple(self.grid_colors[-4:])
+        # The arrays are never replaced, so look up their addresses once
+        # rather than building a ctypes interface for each of them every frame
+        self.grid_pointers = (self.grid_vertices.ctypes.data,
+                              self.grid_colors.ctypes.data,
+                              self.outline_vertices.ctypes.data if self.circular else None)
+
     def draw(self):
+        if self.grid_vertices is None:
+            self._build_grid()
+
+        vertices_ptr, colors_ptr, outline_ptr = self.grid_pointers
+
         glPushMatrix()
 
         glTranslatef(self.xoffset, self.yoffset, self.zoffset)
 
-        def color(i):
-            if i % self.grid[1] == 0:
-                glColor4f(*self.color_grads_major)
-            elif i % (self.grid[1] // 2) == 0:
-                glColor4f(*self.color_grads_interm)
-            else:
-                if self.light: return False
-                glColor4f(*self.color_grads_minor)
-            return True
-
         # draw the grid
-        glBegin(GL_LINES)
-        if self.circular:  # Draw a circular grid
-            for i in numpy.arange(0, int(math.ceil(self.width + 1)), self.grid[0]):
-                angle = math.asin(2 * float(i) / self.width - 1)
-                x = (math.cos(angle) + 1) * self.depth / 2
-                if color(i):
-                    glVertex3f(float(i), self.depth - x, 0.0)
-                    glVertex3f(float(i), x, 0.0)
-
-            for i in numpy.arange(0, int(math.ceil(self.depth + 1)), self.grid[0]):
-                angle = math.acos(2 * float(i) / self.depth - 1)
-                x = (math.sin(angle) + 1) * self.width / 2
-                if color(i):
-                    glVertex3f(self.width - x, float(i), 0.0)
-                    glVertex3f(x, float(i), 0.0)
-        else:  # Draw a rectangular grid
-            for i in numpy.arange(0, int(math.ceil(self.width + 1)), self.grid[0]):
-                if color(i):
-                    glVertex3f(float(i), 0.0, 0.0)
-                    glVertex3f(float(i), self.depth, 0.0)
-
-            for i in numpy.arange(0, int(math.ceil(self.depth + 1)), self.grid[0]):
-                if color(i):
-                    glVertex3f(0, float(i), 0.0)
-                    glVertex3f(self.width, float(i), 0.0)
-        glEnd()
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, vertices_ptr)
+        glColorPointer(4, GL_FLOAT, 0, colors_ptr)
+        glDrawArrays(GL_LINES, 0, len(self.grid_vertices) // 3)
+        glDisableClientState(GL_COLOR_ARRAY)
 
         if self.circular:
-            glBegin(GL_LINE_LOOP)
-            for i in range(0, 360):
-                angle = math.radians(i)
-                glVertex3f((math.cos(angle) + 1) * self.width / 2,
-                           (math.sin(angle) + 1) * self.depth / 2, 0.0)
-            glEnd()
+            glColor4f(*self.outline_color)
+            glVertexPointer(3, GL_FLOAT, 0, outline_ptr)
+            glDrawArrays(GL_LINE_LOOP, 0, len(self.outline_vertices))
+        glDisableClientState(GL_VERTEX_ARRAY)
 
         glPopMatrix()
 
@@ -175,6 +280,9 @@ class Platform:
         self.draw()
 
 class PrintHead:
+    __slots__ = ('color', 'scale', 'height',
+                 'initialized', 'loaded', 'display_list')
+
     def __init__(self):
         self.color = (43. / 255, 0., 175. / 255, 1.0)
         self.scale = 5
@@ -201,13 +309,13 @@ class PrintHead:
         glPopMatrix()
 
     def display(self, mode_2d=False):
+        # Save the line state instead of querying the driver for the line
+        # width every frame
+        glPushAttrib(GL_LINE_BIT)
         glEnable(GL_LINE_SMOOTH)
-        orig_linewidth = (GLfloat)()
-        glGetFloatv(GL_LINE_WIDTH, orig_linewidth)
         glLineWidth(3.0)
         glCallList(self.display_list)
-        glLineWidth(orig_linewidth)
-        glDisable(GL_LINE_SMOOTH)
+        glPopAttrib()
 
 class Model:
     """
@@ -258,11 +366,11 @@ class Model:
         """
         Calculate an axis-aligned box enclosing the model.
         """
-        # swap rows and columns in our vertex arrays so that we can do max and
-        # min on axis 1
-        xyz_rows = self.vertices.reshape(-1, order='F').reshape(3, -1)
-        lower_corner = xyz_rows.min(1)
-        upper_corner = xyz_rows.max(1)
+        # view the flat C-ordered vertex array as one xyz row per vertex so
+        # that we can do max and min on axis 0 without copying
+        xyz_rows = self.vertices.reshape(-1, 3)
+        lower_corner = xyz_rows.min(0)
+        upper_corner = xyz_rows.max(0)
         box = BoundingBox(upper_corner, lower_corner)
         return box
 
@@ -282,19 +390,27 @@ class Model:
         """
         Return the color to use for particular type of movement.
         """
+        return self.movement_color_lut()[self.movement_color_index(move)]
+
+    def movement_color_lut(self):
+        """
+        Return the movement colors as a table indexed by movement_color_index.
+        """
+        return (self.color_tool0, self.color_tool1, self.color_tool2,
+                self.color_tool3, self.color_tool4, self.color_travel)
+
+    @staticmethod
+    def movement_color_index(move):
+        """
+        Return the row of the movement color table to use for particular
+        type of movement.
+        """
         if move.extruding:
-            if move.current_tool == 0:
-                return self.color_tool0
-            elif move.current_tool == 1:
-                return self.color_tool1
-            elif move.current_tool == 2:
-                return self.color_tool2
-            elif move.current_tool == 3:
-                return self.color_tool3
-            else:
-                return self.color_tool4
+            if move.current_tool in (0, 1, 2, 3):
+                return move.current_tool
+            return 4
 
-        return self.color_travel
+        return 5
 
 def movement_angle(src, dst, precision=0):
     x = dst[0] - src[0]
@@ -315,45 +431,70 @@ def get_next_move(gcode, layer_idx, gline_idx):
         gline_idx = 0
     return None
 
-def interpolate_arcs(gline, prev_gline):
-    if gline.command == "G2" or gline.command == "G3":
-        rx = gline.i if gline.i is not None else 0
-        ry = gline.j if gline.j is not None else 0
-        r = math.sqrt(rx*rx + ry*ry)
-
-        cx = prev_gline.current_x + rx
-        cy = prev_gline.current_y + ry
-
-        a_start = math.atan2(-ry, -rx)
-        dx = gline.current_x - cx
-        dy = gline.current_y - cy
-        a_end = math.atan2(dy, dx)
-        a_delta = a_end - a_start
-
-        if gline.command == "G3" and a_delta <= 0:
-            a_delta += math.pi * 2
-        elif gline.command == "G2" and a_delta >= 0:
-            a_delta -= math.pi * 2
-
-        z0 = prev_gline.current_z
-        dz = gline.current_z - z0
-
-        # max segment size: 0.5mm, max num of segments: 100
-        segments = math.ceil(abs(a_delta) * r * 2 / 0.5)
-        if segments > 100:
-            segments = 100
-
-        for t in range(segments):
-            a = t / segments * a_delta + a_start
-
-            mid = ((
-                cx + math.cos(a) * r,
-                cy + math.sin(a) * r,
-                z0 + t / segments * dz
-            ), True)
-            yield mid
+def compute_vertices(pos, normal_x, normal_y, halfwidth, halfheight):
+    """
+    Return the vertices and normals of the four corners of the extrusion
+    path cross-section at pos, perpendicular to the move direction.
+    Normals are scaled to the signed byte range they are stored in.
+    """
+    x, y, z = pos
+    dx = halfwidth * normal_x
+    dy = halfwidth * normal_y
+    nx = round(normal_x * 127)
+    ny = round(normal_y * 127)
+    return ((x, y, z + halfheight,
+             x - dx, y - dy, z,
+             x, y, z - halfheight,
+             x + dx, y + dy, z),
+            (0, 0, 127,
+             -nx, -ny, 0,
+             0, 0, -127,
+             nx, ny, 0))
 
-    yield ((gline.current_x, gline.current_y, gline.current_z), False) # last segment of this line
+def interpolate_arcs(gline, prev_gline):
+    """
+    Return the points of the move of gline as (position, interpolated)
+    pairs, with G2/G3 arcs split into short straight segments.
+    """
+    last = ((gline.current_x, gline.current_y, gline.current_z), False) # last segment of this line
+    if gline.command != "G2" and gline.command != "G3":
+        return [last]
+
+    rx = gline.i if gline.i is not None else 0
+    ry = gline.j if gline.j is not None else 0
+    r = math.sqrt(rx*rx + ry*ry)
+
+    cx = prev_gline.current_x + rx
+    cy = prev_gline.current_y + ry
+
+    a_start = math.atan2(-ry, -rx)
+    dx = gline.current_x - cx
+    dy = gline.current_y - cy
+    a_end = math.atan2(dy, dx)
+    a_delta = a_end - a_start
+
+    if gline.command == "G3" and a_delta <= 0:
+        a_delta += math.pi * 2
+    elif gline.command == "G2" and a_delta >= 0:
+        a_delta -= math.pi * 2
+
+    z0 = prev_gline.current_z
+    dz = gline.current_z - z0
+
+    # max segment size: 0.5mm, max num of segments: 100
+    segments = math.ceil(abs(a_delta) * r * 2 / 0.5)
+    if segments > 100:
+        segments = 100
+
+    # Sample all the points of the arc at once
+    t = numpy.arange(segments) / segments
+    a = t * a_delta + a_start
+    points = zip((cx + numpy.cos(a) * r).tolist(),
+                 (cy + numpy.sin(a) * r).tolist(),
+                 (z0 + t * dz).tolist())
+    arc = [(point, True) for point in points]
+    arc.append(last)
+    return arc
 
 
 class GcodeModel(Model):
@@ -371,9 +512,20 @@ class GcodeModel(Model):
     color_current = (0, 0.9, 1.0, 1.0)
     color_current_printed = (0.1, 0.4, 0, 1.0)
 
+    # Material parameters set on every frame, converted to GL arrays once
+    material_specular = vec(1, 1, 1, 1)
+    material_emission = vec(0, 0, 0, 0)
+
     display_travels = True
 
     buffers_created = False
+    travel_buffer = None
+    index_buffer = None
+    vertex_buffer = None
+    vertex_color_buffer = None
+    vertex_normal_buffer = None
+    # Travel coordinates, coordinates and indices already in the buffers
+    uploaded_counts = (0, 0, 0)
     use_vbos = True
     loaded = False
     fully_loaded = False
@@ -392,9 +544,12 @@ class GcodeModel(Model):
         t_start = time.time()
         self.gcode = model_data
 
-        self.count_travel_indices = count_travel_indices = [0]
-        self.count_print_indices = count_print_indices = [0]
-        self.count_print_vertices = count_print_vertices = [0]
+        self.count_travel_indices = count_travel_indices = array.array('L', [0])
+        self.count_print_indices = count_print_indices = array.array('L', [0])
+        self.count_print_vertices = count_print_vertices = array.array('L', [0])
+        # Movement color of each gline, to rebuild the colors without going
+        # through the whole G-code again
+        self.gline_color_indices = gline_color_indices = array.array('B')
 
         # Some trivial computations, but that's mostly for documentation :)
         # Not like 10 multiplications are going to cost much time vs what's
@@ -422,8 +577,10 @@ class GcodeModel(Model):
         indicesperline = indicesperbox * boxperline
         indices_count = lambda nlines: nlines * indicesperline
 
+        # Travel moves are only stored when they are going to be displayed
+        store_travels = self.display_travels
         nlines = len(model_data)
-        ntravelcoords = travel_coords_count(nlines)
+        ntravelcoords = travel_coords_count(nlines) if store_travels else 0
         ncoords = coords_count(nlines)
         nindices = indices_count(nlines)
         travel_vertices = self.travels = numpy.zeros(ntravelcoords, dtype = GLfloat)
@@ -433,15 +590,15 @@ class GcodeModel(Model):
         colors = self.colors = numpy.zeros(ncoords, dtype = GLfloat)
 
         color_k = 0
-        normals = self.normals = numpy.zeros(ncoords, dtype = GLfloat)
+        # Normals only need a few bits of precision, store them as bytes
+        normals = self.normals = numpy.zeros(ncoords, dtype = numpy.int8)
         indices = self.indices = numpy.zeros(nindices, dtype = GLuint)
         index_k = 0
         self.layer_idxs_map = {}
-        self.layer_stops = [0]
+        self.layer_stops = array.array('L', [0])
 
         prev_move_normal_x = None
         prev_move_normal_y = None
-        prev_move_angle = None
         prev_pos = (0, 0, 0)
         prev_gline = None
         prev_extruding = False
@@ -450,7 +607,8 @@ class GcodeModel(Model):
         self.printed_until = 0
         self.only_current = False
 
-        twopi = 2 * math.pi
+        # settings support alpha (transparency), but it is ignored here
+        color_lut = numpy.array(self.movement_color_lut(), dtype = GLfloat)[:, :buffered_color_len]
 
         processed_lines = 0
 
@@ -460,54 +618,79 @@ class GcodeModel(Model):
                 remaining_lines = nlines - processed_lines
                 # Only reallocate memory which might be needed, not memory
                 # for everything
-                ntravelcoords = coords_count(remaining_lines) + travel_vertex_k
+                ntravelcoords = coords_count(remaining_lines) + travel_vertex_k if store_travels else 0
                 ncoords = coords_count(remaining_lines) + vertex_k
                 nindices = indices_count(remaining_lines) + index_k
                 if ncoords > vertices.size:
-                    self.travels.resize(ntravelcoords, refcheck = False)
-                    self.vertices.resize(ncoords, refcheck = False)
-                    self.colors.resize(ncoords, refcheck = False)
-                    self.normals.resize(ncoords, refcheck = False)
-                    self.indices.resize(nindices, refcheck = False)
+                    # These sizes are upper bounds for the rest of the file,
+                    # don't waste memory by doubling them
+                    grow_array(travel_vertices, ntravelcoords, exact = True)
+                    grow_array(vertices, ncoords, exact = True)
+                    grow_array(colors, ncoords, exact = True)
+                    grow_array(normals, ncoords, exact = True)
+                    grow_array(indices, nindices, exact = True)
                 layer = model_data.all_layers[layer_idx]
                 has_movement = False
-                for gline_idx, gline in enumerate(layer):
-                    if not gline.is_move:
-                        continue
+                # FIXME: compute these dynamically
+                path_halfwidth = self.path_halfwidth * 1.2
+                path_halfheight = self.path_halfheight * 1.2
+                # Gather the moves of the layer first, so that the direction
+                # of every segment can be computed in one go with numpy
+                layer_moves = []
+                moves_x = [prev_pos[0]]
+                moves_y = [prev_pos[1]]
+                arc_prev_gline = prev_gline
+                move_glines = [gline for gline in layer if gline.is_move]
+                for move_idx, gline in enumerate(move_glines):
                     if gline.x is None and gline.y is None and gline.z is None and gline.j is None and gline.i is None:
                         continue
+                    positions = interpolate_arcs(gline, arc_prev_gline)
+                    layer_moves.append((move_idx, gline, positions))
+                    for current_pos, interpolated in positions:
+                        moves_x.append(current_pos[0])
+                        moves_y.append(current_pos[1])
+                    arc_prev_gline = gline
+                deltas_x = numpy.diff(moves_x)
+                deltas_y = numpy.diff(moves_y)
+                norms = numpy.hypot(deltas_x, deltas_y)
+                with numpy.errstate(divide = 'ignore', invalid = 'ignore'):
+                    move_directions = zip(norms.tolist(),
+                                          (-deltas_y / norms).tolist(),
+                                          (deltas_x / norms).tolist())
+
+                last_move_idx = len(move_glines) - 1
+                layer_first_gline = len(count_print_vertices)
+                for move_idx, gline, positions in layer_moves:
                     has_movement = True
-                    for (current_pos, interpolated) in interpolate_arcs(gline, prev_gline):
+                    color_index = self.movement_color_index(gline)
+                    for (current_pos, interpolated) in positions:
+                        norm, move_normal_x, move_normal_y = next(move_directions)
                         if not gline.extruding:
-                            if self.travels.size < (travel_vertex_k + 100 * 6):
-                                # arc interpolation extra points allocation
-                                # if not enough room for another 100 points now,
-                                # allocate enough and 50% extra to minimize separate allocations
-                                ratio = (travel_vertex_k + 100 * 6) / self.travels.size * 1.5
-                                # print(f"gl realloc travel {self.travels.size} -> {int(self.travels.size * ratio)}")
-                                self.travels.resize(int(self.travels.size * ratio), refcheck = False)
-
-                            travel_vertices[travel_vertex_k:travel_vertex_k+3] = prev_pos
-                            travel_vertices[travel_vertex_k + 3:travel_vertex_k + 6] = current_pos
-                            travel_vertex_k += 6
+                            if store_travels:
+                                if travel_vertices.size < travel_vertex_k + 6:
+                                    # arc interpolation extra points allocation
+                                    grow_array(travel_vertices, travel_vertex_k + 6)
+
+                                travel_vertices[travel_vertex_k:travel_vertex_k+3] = prev_pos
+                                travel_vertices[travel_vertex_k + 3:travel_vertex_k + 6] = current_pos
+                                travel_vertex_k += 6
                         else:
-                            delta_x = current_pos[0] - prev_pos[0]
-                            delta_y = current_pos[1] - prev_pos[1]
-                            norm = delta_x * delta_x + delta_y * delta_y
                             if norm == 0:  # Don't draw anything if this move is Z+E only
                                 continue
-                            norm = math.sqrt(norm)
-                            move_normal_x = - delta_y / norm
-                            move_normal_y = delta_x / norm
-                            move_angle = math.atan2(delta_y, delta_x)
-
-                            # FIXME: compute these dynamically
-                            path_halfwidth = self.path_halfwidth * 1.2
-                            path_halfheight = self.path_halfheight * 1.2
-
-                            new_indices = []
-                            new_vertices = []
-                            new_normals = []
+
+                            # Make room for up to three cross-sections and
+                            # their triangles, which are written in place below
+                            if vertices.size < vertex_k + 3 * 12:
+                                # arc interpolation extra points allocation
+                                grow_array(vertices, vertex_k + 3 * 12)
+                                grow_array(colors, vertex_k + 3 * 12)
+                                grow_array(normals, vertex_k + 3 * 12)
+                            if indices.size < index_k + 3 * indicesperbox + 6:
+                                grow_array(indices, index_k + 3 * indicesperbox + 6)
+
+                            # The four vertices of a cross-section are always followed
+                            # by those of the next one, so each box links the vertices
+                            # first..first + 3 to first + 4..first + 7
                             if prev_gline and prev_gline.extruding or prev_extruding:
                                 # Store previous vertices indices
                                 prev_id = vertex_k // 3 - 4
@@ -521,142 +704,68 @@ class GcodeModel(Model):
                                     norm = math.sqrt(norm)
                                     avg_move_normal_x /= norm
                                     avg_move_normal_y /= norm
-                                delta_angle = move_angle - prev_move_angle
-                                delta_angle = (delta_angle + twopi) % twopi
-                                fact = abs(math.cos(delta_angle / 2))
+                                # cos(delta_angle / 2) from the half-angle formula,
+                                # cos(delta_angle) being the dot product of the normals
+                                cos_delta_angle = prev_move_normal_x * move_normal_x + prev_move_normal_y * move_normal_y
+                                fact = math.sqrt(max(0.0, (1 + cos_delta_angle) / 2))
                                 # If move is turning too much, avoid creating a big peak
                                 # by adding an intermediate box
                                 if fact < 0.5:
-                                    # FIXME: It looks like there's some heavy code duplication here...
-                                    hw = path_halfwidth
-                                    p1x = prev_pos[0] - hw * prev_move_normal_x
-                                    p2x = prev_pos[0] + hw * prev_move_normal_x
-                                    p1y = prev_pos[1] - hw * prev_move_normal_y
-                                    p2y = prev_pos[1] + hw * prev_move_normal_y
-                                    new_vertices.extend((prev_pos[0], prev_pos[1], prev_pos[2] + path_halfheight))
-                                    new_vertices.extend((p1x, p1y, prev_pos[2]))
-                                    new_vertices.extend((prev_pos[0], prev_pos[1], prev_pos[2] - path_halfheight))
-                                    new_vertices.extend((p2x, p2y, prev_pos[2]))
-                                    new_normals.extend((0, 0, 1))
-                                    new_normals.extend((-prev_move_normal_x, -prev_move_normal_y, 0))
-                                    new_normals.extend((0, 0, -1))
-                                    new_normals.extend((prev_move_normal_x, prev_move_normal_y, 0))
                                     first = vertex_k // 3
+                                    vertices[vertex_k:vertex_k + 12], normals[vertex_k:vertex_k + 12] = compute_vertices(
+                                        prev_pos, prev_move_normal_x, prev_move_normal_y,
+                                        path_halfwidth, path_halfheight)
+                                    vertex_k += 12
                                     # Link to previous
-                                    new_indices += triangulate_box(prev_id, prev_id + 1,
-                                                                prev_id + 2, prev_id + 3,
-                                                                first, first + 1,
-                                                                first + 2, first + 3)
-                                    p1x = prev_pos[0] - hw * move_normal_x
-                                    p2x = prev_pos[0] + hw * move_normal_x
-                                    p1y = prev_pos[1] - hw * move_normal_y
-                                    p2y = prev_pos[1] + hw * move_normal_y
-                                    new_vertices.extend((prev_pos[0], prev_pos[1], prev_pos[2] + path_halfheight))
-                                    new_vertices.extend((p1x, p1y, prev_pos[2]))
-                                    new_vertices.extend((prev_pos[0], prev_pos[1], prev_pos[2] - path_halfheight))
-                                    new_vertices.extend((p2x, p2y, prev_pos[2]))
-                                    new_normals.extend((0, 0, 1))
-                                    new_normals.extend((-move_normal_x, -move_normal_y, 0))
-                                    new_normals.extend((0, 0, -1))
-                                    new_normals.extend((move_normal_x, move_normal_y, 0))
+                                    numpy.add(BOX_INDICES, prev_id, out = indices[index_k:index_k + indicesperbox])
+                                    index_k += indicesperbox
+                                    vertices[vertex_k:vertex_k + 12], normals[vertex_k:vertex_k + 12] = compute_vertices(
+                                        prev_pos, move_normal_x, move_normal_y,
+                                        path_halfwidth, path_halfheight)
+                                    vertex_k += 12
                                     prev_id += 4
                                     first += 4
                                     # Link to previous
-                                    new_indices += triangulate_box(prev_id, prev_id + 1,
-                                                                prev_id + 2, prev_id + 3,
-                                                                first, first + 1,
-                                                                first + 2, first + 3)
+                                    numpy.add(BOX_INDICES, prev_id, out = indices[index_k:index_k + indicesperbox])
+                                    index_k += indicesperbox
                                 else:
-                                    hw = path_halfwidth / fact
-                                    # Compute vertices
-                                    p1x = prev_pos[0] - hw * avg_move_normal_x
-                                    p2x = prev_pos[0] + hw * avg_move_normal_x
-                                    p1y = prev_pos[1] - hw * avg_move_normal_y
-                                    p2y = prev_pos[1] + hw * avg_move_normal_y
-                                    new_vertices.extend((prev_pos[0], prev_pos[1], prev_pos[2] + path_halfheight))
-                                    new_vertices.extend((p1x, p1y, prev_pos[2]))
-                                    new_vertices.extend((prev_pos[0], prev_pos[1], prev_pos[2] - path_halfheight))
-                                    new_vertices.extend((p2x, p2y, prev_pos[2]))
-                                    new_normals.extend((0, 0, 1))
-                                    new_normals.extend((-avg_move_normal_x, -avg_move_normal_y, 0))
-                                    new_normals.extend((0, 0, -1))
-                                    new_normals.extend((avg_move_normal_x, avg_move_normal_y, 0))
                                     first = vertex_k // 3
+                                    vertices[vertex_k:vertex_k + 12], normals[vertex_k:vertex_k + 12] = compute_vertices(
+                                        prev_pos, avg_move_normal_x, avg_move_normal_y,
+                                        path_halfwidth / fact, path_halfheight)
+                                    vertex_k += 12
                                     # Link to previous
-                                    new_indices += triangulate_box(prev_id, prev_id + 1,
-                                                                prev_id + 2, prev_id + 3,
-                                                                first, first + 1,
-                                                                first + 2, first + 3)
+                                    numpy.add(BOX_INDICES, prev_id, out = indices[index_k:index_k + indicesperbox])
+                                    index_k += indicesperbox
                             else:
                                 # Compute vertices normal to the current move and cap it
-                                p1x = prev_pos[0] - path_halfwidth * move_normal_x
-                                p2x = prev_pos[0] + path_halfwidth * move_normal_x
-                                p1y = prev_pos[1] - path_halfwidth * move_normal_y
-                                p2y = prev_pos[1] + path_halfwidth * move_normal_y
-                                new_vertices.extend((prev_pos[0], prev_pos[1], prev_pos[2] + path_halfheight))
-                                new_vertices.extend((p1x, p1y, prev_pos[2]))
-                                new_vertices.extend((prev_pos[0], prev_pos[1], prev_pos[2] - path_halfheight))
-                                new_vertices.extend((p2x, p2y, prev_pos[2]))
-                                new_normals.extend((0, 0, 1))
-                                new_normals.extend((-move_normal_x, -move_normal_y, 0))
-                                new_normals.extend((0, 0, -1))
-                                new_normals.extend((move_normal_x, move_normal_y, 0))
                                 first = vertex_k // 3
-                                new_indices = triangulate_rectangle(first, first + 1,
-                                                                    first + 2, first + 3)
-
-                            next_move = get_next_move(model_data, layer_idx, gline_idx)
+                                vertices[vertex_k:vertex_k + 12], normals[vertex_k:vertex_k + 12] = compute_vertices(
+                                    prev_pos, move_normal_x, move_normal_y,
+                                    path_halfwidth, path_halfheight)
+                                vertex_k += 12
+                                numpy.add(RECTANGLE_INDICES, first, out = indices[index_k:index_k + 6])
+                                index_k += 6
+
+                            if move_idx < last_move_idx:
+                                next_move = move_glines[move_idx + 1]
+                            else:
+                                next_move = get_next_move(model_data, layer_idx, len(layer) - 1)
                             next_is_extruding = interpolated or next_move and next_move.extruding
                             if not next_is_extruding:
                                 # Compute caps and link everything
-                                p1x = current_pos[0] - path_halfwidth * move_normal_x
-                                p2x = current_pos[0] + path_halfwidth * move_normal_x
-                                p1y = current_pos[1] - path_halfwidth * move_normal_y
-                                p2y = current_pos[1] + path_halfwidth * move_normal_y
-                                new_vertices.extend((current_pos[0], current_pos[1], current_pos[2] + path_halfheight))
-                                new_vertices.extend((p1x, p1y, current_pos[2]))
-                                new_vertices.extend((current_pos[0], current_pos[1], current_pos[2] - path_halfheight))
-                                new_vertices.extend((p2x, p2y, current_pos[2]))
-                                new_normals.extend((0, 0, 1))
-                                new_normals.extend((-move_normal_x, -move_normal_y, 0))
-                                new_normals.extend((0, 0, -1))
-                                new_normals.extend((move_normal_x, move_normal_y, 0))
-                                end_first = vertex_k // 3 + len(new_vertices) // 3 - 4
-                                new_indices += triangulate_rectangle(end_first + 3, end_first + 2,
-                                                                    end_first + 1, end_first)
-                                new_indices += triangulate_box(first, first + 1,
-                                                            first + 2, first + 3,
-                                                            end_first, end_first + 1,
-                                                            end_first + 2, end_first + 3)
-
-                            if self.indices.size < (index_k + len(new_indices) + 100 * indicesperline):
-                                # arc interpolation extra points allocation
-                                ratio = (index_k + len(new_indices) + 100 * indicesperline) / self.indices.size * 1.5
-                                # print(f"gl realloc print {self.vertices.size} -> {int(self.vertices.size * ratio)}")
-                                self.vertices.resize(int(self.vertices.size * ratio), refcheck = False)
-                                self.colors.resize(int(self.colors.size * ratio), refcheck = False)
-                                self.normals.resize(int(self.normals.size * ratio), refcheck = False)
-                                self.indices.resize(int(self.indices.size * ratio), refcheck = False)
-
-                            for new_i, item in enumerate(new_indices):
-                                indices[index_k + new_i] = item
-                            index_k += len(new_indices)
-
-                            new_vertices_len = len(new_vertices)
-                            vertices[vertex_k:vertex_k+new_vertices_len] = new_vertices
-                            normals[vertex_k:vertex_k+new_vertices_len] = new_normals
-                            vertex_k += new_vertices_len
-
-                            new_vertices_count = new_vertices_len//coordspervertex
-                            # settings support alpha (transparency), but it is ignored here
-                            gline_color = self.movement_color(gline)[:buffered_color_len]
-                            for vi in range(new_vertices_count):
-                                colors[color_k:color_k+buffered_color_len] = gline_color
-                                color_k += buffered_color_len
+                                end_first = vertex_k // 3
+                                vertices[vertex_k:vertex_k + 12], normals[vertex_k:vertex_k + 12] = compute_vertices(
+                                    current_pos, move_normal_x, move_normal_y,
+                                    path_halfwidth, path_halfheight)
+                                vertex_k += 12
+                                numpy.add(CAP_INDICES, end_first, out = indices[index_k:index_k + 6])
+                                index_k += 6
+                                numpy.add(BOX_INDICES, first, out = indices[index_k:index_k + indicesperbox])
+                                index_k += indicesperbox
 
                             prev_move_normal_x = move_normal_x
                             prev_move_normal_y = move_normal_y
-                            prev_move_angle = move_angle
 
                         prev_pos = current_pos
                         prev_extruding = gline.extruding
@@ -666,8 +775,17 @@ class GcodeModel(Model):
                     count_travel_indices.append(travel_vertex_k // 3)
                     count_print_indices.append(index_k)
                     count_print_vertices.append(vertex_k // 3)
+                    gline_color_indices.append(color_index)
                     gline.gcview_end_vertex = len(count_print_indices) - 1
 
+                # Every vertex takes the color of its gline, so the colors of
+                # the whole layer are broadcast from the lookup table at once
+                layer_vertex_counts = numpy.diff(numpy.asarray(count_print_vertices[layer_first_gline - 1:], dtype = numpy.intp))
+                layer_color_indices = numpy.asarray(gline_color_indices[layer_first_gline - 1:], dtype = numpy.intp)
+                layer_colors = numpy.repeat(color_lut[layer_color_indices], layer_vertex_counts, axis = 0).ravel()
+                colors[color_k:color_k + layer_colors.size] = layer_colors
+                color_k += layer_colors.size
+
                 if has_movement:
                     self.layer_stops.append(len(count_print_indices) - 1)
                     self.layer_idxs_map[layer_idx] = len(self.layer_stops) - 1
@@ -695,11 +813,6 @@ class GcodeModel(Model):
             self.normals.resize(vertex_k, refcheck = False)
             self.indices.resize(index_k, refcheck = False)
 
-            self.layer_stops = array.array('L', self.layer_stops)
-            self.count_travel_indices = array.array('L', count_travel_indices)
-            self.count_print_indices = array.array('L', count_print_indices)
-            self.count_print_vertices = array.array('L', count_print_vertices)
-
             self.max_layers = len(self.layer_stops) - 1
             self.num_layers_to_draw = self.max_layers + 1
             self.loaded = True
@@ -720,9 +833,9 @@ class GcodeModel(Model):
                     "layer_stops", "dims", "only_current",
                     "layer_idxs_map", "count_travel_indices",
                     "count_print_indices", "count_print_vertices",
-                    "path_halfwidth", "path_halfheight",
+                    "gline_color_indices", "path_halfwidth", "path_halfheight",
                     "gcode"]:
-            setattr(copy, var, getattr(self, var))
+            setattr(copy, var, shared_view(getattr(self, var)))
         copy.loaded = True
         copy.fully_loaded = True
         copy.initialized = False
@@ -730,21 +843,13 @@ class GcodeModel(Model):
 
     def update_colors(self):
         """Rebuild gl color buffer without loading. Used after color settings edit"""
-        ncoords = self.count_print_vertices[-1]
-        colors = numpy.empty(ncoords*3, dtype = GLfloat)
-        cur_vertex = 0
-        gline_i = 1
-        for gline in self.gcode.lines:
-            if gline.gcview_end_vertex:
-                gline_color = self.movement_color(gline)[:3]
-                last_vertex = self.count_print_vertices[gline_i]
-                gline_i += 1
-                while cur_vertex < last_vertex:
-                    colors[cur_vertex*3:cur_vertex*3+3] = gline_color
-                    cur_vertex += 1
-        if self.vertex_color_buffer:
-            self.vertex_color_buffer.delete()
-        self.vertex_color_buffer = numpy2vbo(colors, use_vbos = self.use_vbos)
+        color_lut = numpy.array(self.movement_color_lut(), dtype = GLfloat)[:, :3]
+        color_indices = numpy.frombuffer(self.gline_color_indices, dtype = numpy.uint8)
+        # Number of vertices of each gline, which all share its color
+        vertex_counts = numpy.diff(numpy.asarray(self.count_print_vertices, dtype = numpy.intp))
+        colors = numpy.repeat(color_lut[color_indices], vertex_counts, axis = 0).ravel()
+        self.vertex_color_buffer = numpy2vbo(colors, use_vbos = self.use_vbos,
+                                             vbo = self.vertex_color_buffer)
 
     # ------------------------------------------------------------------------
     # DRAWING
@@ -754,31 +859,53 @@ class GcodeModel(Model):
         with self.lock:
             self.layers_loaded = self.max_layers
             self.initialized = True
-            if self.buffers_created:
-                self.travel_buffer.delete()
-                self.index_buffer.delete()
-                self.vertex_buffer.delete()
-                self.vertex_color_buffer.delete()
-                self.vertex_normal_buffer.delete()
-            self.travel_buffer = numpy2vbo(self.travels, use_vbos = self.use_vbos)
-            self.index_buffer = numpy2vbo(self.indices, use_vbos = self.use_vbos,
-                                          target = GL_ELEMENT_ARRAY_BUFFER)
-            self.vertex_buffer = numpy2vbo(self.vertices, use_vbos = self.use_vbos)
-            self.vertex_color_buffer = numpy2vbo(self.colors, use_vbos = self.use_vbos)
-            self.vertex_normal_buffer = numpy2vbo(self.normals, use_vbos = self.use_vbos)
             if self.fully_loaded:
+                self.travel_buffer = numpy2vbo(self.travels, use_vbos = self.use_vbos,
+                                               vbo = self.travel_buffer)
+                self.index_buffer = numpy2vbo(self.indices, use_vbos = self.use_vbos,
+                                              target = GL_ELEMENT_ARRAY_BUFFER,
+                                              vbo = self.index_buffer)
+                self.vertex_buffer = numpy2vbo(self.vertices, use_vbos = self.use_vbos,
+                                               vbo = self.vertex_buffer)
+                self.vertex_color_buffer = numpy2vbo(self.colors, use_vbos = self.use_vbos,
+                                                     vbo = self.vertex_color_buffer)
+                self.vertex_normal_buffer = numpy2vbo(self.normals, use_vbos = self.use_vbos,
+                                                      vbo = self.vertex_normal_buffer)
                 # Delete numpy arrays after creating VBOs after full load
                 self.travels = None
                 self.indices = None
                 self.vertices = None
                 self.colors = None
                 self.normals = None
+            else:
+                # While loading, the arrays are preallocated for the whole
+                # file: only upload what was filled since the last call
+                ntravelcoords = self.count_travel_indices[-1] * 3
+                ncoords = self.count_print_vertices[-1] * 3
+                nindices = self.count_print_indices[-1]
+                uploaded_travelcoords, uploaded_coords, uploaded_indices = self.uploaded_counts
+                self.travel_buffer = append2vbo(self.travels, ntravelcoords, uploaded_travelcoords,
+                                                self.travel_buffer, use_vbos = self.use_vbos)
+                self.index_buffer = append2vbo(self.indices, nindices, uploaded_indices,
+                                               self.index_buffer, use_vbos = self.use_vbos,
+                                               target = GL_ELEMENT_ARRAY_BUFFER)
+                self.vertex_buffer = append2vbo(self.vertices, ncoords, uploaded_coords,
+                                                self.vertex_buffer, use_vbos = self.use_vbos)
+                self.vertex_color_buffer = append2vbo(self.colors, ncoords, uploaded_coords,
+                                                      self.vertex_color_buffer, use_vbos = self.use_vbos)
+                self.vertex_normal_buffer = append2vbo(self.normals, ncoords, uploaded_coords,
+                                                       self.vertex_normal_buffer, use_vbos = self.use_vbos)
+                self.uploaded_counts = (ntravelcoords, ncoords, nindices)
             self.buffers_created = True
 
     def display(self, mode_2d=False):
         with self.lock:
-            glPushMatrix()
-            glTranslatef(self.offset_x, self.offset_y, 0)
+            # Models are usually placed by the caller, skip the matrix work
+            # when there is no offset of their own
+            has_offset = self.offset_x or self.offset_y
+            if has_offset:
+                glPushMatrix()
+                glTranslatef(self.offset_x, self.offset_y, 0)
             glEnableClientState(GL_VERTEX_ARRAY)
 
             has_vbo = isinstance(self.vertex_buffer, VertexBufferObject)
@@ -788,8 +915,8 @@ class GcodeModel(Model):
             glEnable(GL_LIGHTING)
             glEnableClientState(GL_NORMAL_ARRAY)
             glEnableClientState(GL_COLOR_ARRAY)
-            glMaterialfv(GL_FRONT, GL_SPECULAR, vec(1, 1, 1, 1))
-            glMaterialfv(GL_FRONT_AND_BACK, GL_EMISSION, vec(0, 0, 0, 0))
+            glMaterialfv(GL_FRONT, GL_SPECULAR, self.material_specular)
+            glMaterialfv(GL_FRONT_AND_BACK, GL_EMISSION, self.material_emission)
             glMaterialf(GL_FRONT_AND_BACK, GL_SHININESS, 50)
 
             glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
@@ -801,7 +928,8 @@ class GcodeModel(Model):
             glDisableClientState(GL_VERTEX_ARRAY)
             glDisableClientState(GL_NORMAL_ARRAY)
 
-            glPopMatrix()
+            if has_offset:
+                glPopMatrix()
 
     def _display_travels(self, has_vbo):
         self.travel_buffer.bind()
@@ -809,14 +937,17 @@ class GcodeModel(Model):
 
         # Prevent race condition by using the number of currently loaded layers
         max_layers = self.layers_loaded
+        num_layers_to_draw = self.num_layers_to_draw
+        layer_stops = self.layer_stops
+        count_travel_indices = self.count_travel_indices
         # TODO: show current layer travels in a different color
-        end = self.layer_stops[min(self.num_layers_to_draw, max_layers)]
-        end_index = self.count_travel_indices[end]
+        end = layer_stops[min(num_layers_to_draw, max_layers)]
+        end_index = count_travel_indices[end]
         glColor4f(*self.color_travel)
         if self.only_current:
-            if self.num_layers_to_draw < max_layers:
-                end_prev_layer = self.layer_stops[self.num_layers_to_draw - 1]
-                start_index = self.count_travel_indices[end_prev_layer + 1]
+            if num_layers_to_draw < max_layers:
+                end_prev_layer = layer_stops[num_layers_to_draw - 1]
+                start_index = count_travel_indices[end_prev_layer + 1]
                 glDrawArrays(GL_LINES, start_index, end_index - start_index + 1)
         else:
             glDrawArrays(GL_LINES, 0, end_index)
@@ -824,15 +955,18 @@ class GcodeModel(Model):
         self.travel_buffer.unbind()
 
     def _draw_elements(self, start, end, draw_type = GL_TRIANGLES):
+        first_index = self.count_print_indices[start - 1]
+        nindices = self.count_print_indices[end] - first_index
         # Don't attempt printing empty layer
-        if self.count_print_indices[end] == self.count_print_indices[start - 1]:
+        if not nindices:
             return
+        count_print_vertices = self.count_print_vertices
         glDrawRangeElements(draw_type,
-                            self.count_print_vertices[start - 1],
-                            self.count_print_vertices[end] - 1,
-                            self.count_print_indices[end] - self.count_print_indices[start - 1],
+                            count_print_vertices[start - 1],
+                            count_print_vertices[end] - 1,
+                            nindices,
                             GL_UNSIGNED_INT,
-                            sizeof(GLuint) * self.count_print_indices[start - 1])
+                            sizeof(GLuint) * first_index)
 
     def _display_movements(self, has_vbo):
         self.vertex_buffer.bind()
@@ -842,40 +976,41 @@ class GcodeModel(Model):
         glColorPointer(3, GL_FLOAT, 0, self.vertex_color_buffer.ptr)
 
         self.vertex_normal_buffer.bind()
-        glNormalPointer(GL_FLOAT, 0, self.vertex_normal_buffer.ptr)
+        glNormalPointer(GL_BYTE, 0, self.vertex_normal_buffer.ptr)
 
         self.index_buffer.bind()
 
         # Prevent race condition by using the number of currently loaded layers
         max_layers = self.layers_loaded
+        num_layers_to_draw = self.num_layers_to_draw
+        printed_until = self.printed_until
+        only_current = self.only_current
+        draw_elements = self._draw_elements
 
         start = 1
-        layer_selected = self.num_layers_to_draw <= max_layers
+        layer_selected = num_layers_to_draw <= max_layers
         if layer_selected:
-            end_prev_layer = self.layer_stops[self.num_layers_to_draw - 1]
+            end_prev_layer = self.layer_stops[num_layers_to_draw - 1]
         else:
             end_prev_layer = 0
-        end = self.layer_stops[min(self.num_layers_to_draw, max_layers)]
-
-        glDisableClientState(GL_COLOR_ARRAY)
-
-        glColor3f(*self.color_printed[:-1])
-
-        # Draw printed stuff until end or end_prev_layer
-        cur_end = min(self.printed_until, end)
-        if not self.only_current:
-            if 1 <= end_prev_layer <= cur_end:
-                self._draw_elements(1, end_prev_layer)
-            elif cur_end >= 1:
-                self._draw_elements(1, cur_end)
-
-        glEnableClientState(GL_COLOR_ARRAY)
+        end = self.layer_stops[min(num_layers_to_draw, max_layers)]
+
+        # Draw printed stuff until end or end_prev_layer, only switching
+        # to the printed color when there is something to draw
+        cur_end = min(printed_until, end)
+        if not only_current:
+            printed_end = end_prev_layer if 1 <= end_prev_layer <= cur_end else cur_end
+            if printed_end >= 1:
+                glDisableClientState(GL_COLOR_ARRAY)
+                glColor3f(*self.color_printed[:-1])
+                draw_elements(1, printed_end)
+                glEnableClientState(GL_COLOR_ARRAY)
 
         # Draw nonprinted stuff until end_prev_layer
         start = max(cur_end, 1)
         if end_prev_layer >= start:
-            if not self.only_current:
-                self._draw_elements(start, end_prev_layer)
+            if not only_current:
+                draw_elements(start, end_prev_layer)
             cur_end = end_prev_layer
 
         # Draw current layer
@@ -885,28 +1020,33 @@ class GcodeModel(Model):
             glColor3f(*self.color_current_printed[:-1])
 
             if cur_end > end_prev_layer:
-                self._draw_elements(end_prev_layer + 1, cur_end)
+                draw_elements(end_prev_layer + 1, cur_end)
 
             glColor3f(*self.color_current[:-1])
 
             if end > cur_end:
-                self._draw_elements(cur_end + 1, end)
+                draw_elements(cur_end + 1, end)
 
             glEnableClientState(GL_COLOR_ARRAY)
 
         # Draw non printed stuff until end (if not ending at a given layer)
-        start = max(self.printed_until, 1)
+        start = max(printed_until, 1)
         if not layer_selected and end >= start:
-            self._draw_elements(start, end)
+            draw_elements(start, end)
 
+        # All the vertex buffers share the GL_ARRAY_BUFFER binding, a
+        # single unbind releases them
         self.index_buffer.unbind()
         self.vertex_buffer.unbind()
-        self.vertex_color_buffer.unbind()
-        self.vertex_normal_buffer.unbind()
 
 class GcodeModelLight(Model):
     """
     Model for displaying Gcode data.
+
+    Every movement starts where the previous one ended, so the whole file
+    is stored as a single line strip: segment i goes from vertex i to
+    vertex i + 1 and takes the color of vertex i + 1. Layer stops and
+    printed positions are counted in segments.
     """
 
     color_travel = (0.6, 0.6, 0.6, 0.6)
@@ -920,6 +1060,10 @@ class GcodeModelLight(Model):
     color_current_printed = (0.1, 0.4, 0, 0.8)
 
     buffers_created = False
+    vertex_buffer = None
+    vertex_color_buffer = None
+    # Coordinates and color components already in the buffers
+    uploaded_counts = (0, 0)
     use_vbos = True
     loaded = False
     fully_loaded = False
@@ -933,66 +1077,70 @@ class GcodeModelLight(Model):
         self.layer_idxs_map = {}
         self.layer_stops = [0]
 
-        prev_pos = (0, 0, 0)
         layer_idx = 0
         nlines = len(model_data)
-        vertices = self.vertices = numpy.zeros(nlines * 6, dtype = GLfloat)
-        vertex_k = 0
-        colors = self.colors = numpy.zeros(nlines * 8, dtype = GLfloat)
-        color_k = 0
+        # The strip starts at the origin, which keeps a zero color: it is
+        # never the last vertex of a segment
+        vertices = self.vertices = numpy.zeros(nlines * 3 + 3, dtype = GLfloat)
+        vertex_k = 3
+        colors = self.colors = numpy.zeros(nlines * 4 + 4, dtype = numpy.uint8)
+        color_k = 4
         self.printed_until = -1
         self.only_current = False
+        color_lut = self.movement_color_lut_ubyte()
+        # Movement color of each segment, to rebuild the colors without
+        # going through the whole G-code again
+        self.segment_color_indices = segment_color_indices = array.array('B')
         prev_gline = None
         while layer_idx < len(model_data.all_layers):
+            layer = model_data.all_layers[layer_idx]
+            has_movement = False
+            # Gather the whole layer first, without holding the lock the
+            # drawing needs on every frame, then store it with a single
+            # slice assignment per buffer
+            layer_vertices = []
+            layer_colors = []
+            first_segment = vertex_k // 3 - 1
+            for gline in layer:
+                if not gline.is_move:
+                    continue
+                if gline.x is None and gline.y is None and gline.z is None:
+                    continue
+
+                has_movement = True
+                positions = interpolate_arcs(gline, prev_gline)
+                for current_pos, interpolated in positions:
+                    layer_vertices.extend(current_pos)
+                # Every point of the move shares its color and gline, which
+                # only need to be recorded once
+                layer_colors.extend([self.movement_color_index(gline)] * len(positions))
+                prev_gline = gline
+                gline.gcview_end_vertex = first_segment + len(layer_colors)
+
             with self.lock:
                 nlines = len(model_data)
-                if nlines * 6 > vertices.size:
-                    self.vertices.resize(nlines * 6, refcheck = False)
-                    self.colors.resize(nlines * 8, refcheck = False)
-                layer = model_data.all_layers[layer_idx]
-                has_movement = False
-                for gline in layer:
-                    if not gline.is_move:
-                        continue
-                    if gline.x is None and gline.y is None and gline.z is None:
-                        continue
-
-                    has_movement = True
-                    for (current_pos, interpolated) in interpolate_arcs(gline, prev_gline):
-
-                        if self.vertices.size < (vertex_k + 100 * 6):
-                            # arc interpolation extra points allocation
-                            ratio = (vertex_k + 100 * 6) / self.vertices.size * 1.5
-                            # print(f"gl realloc lite {self.vertices.size} -> {int(self.vertices.size * ratio)}")
-                            self.vertices.resize(int(self.vertices.size * ratio), refcheck = False)
-                            self.colors.resize(int(self.colors.size * ratio), refcheck = False)
-
-
-                        vertices[vertex_k] = prev_pos[0]
-                        vertices[vertex_k + 1] = prev_pos[1]
-                        vertices[vertex_k + 2] = prev_pos[2]
-                        vertices[vertex_k + 3] = current_pos[0]
-                        vertices[vertex_k + 4] = current_pos[1]
-                        vertices[vertex_k + 5] = current_pos[2]
-                        vertex_k += 6
-
-                        vertex_color = self.movement_color(gline)
-                        colors[color_k] = vertex_color[0]
-                        colors[color_k + 1] = vertex_color[1]
-                        colors[color_k + 2] = vertex_color[2]
-                        colors[color_k + 3] = vertex_color[3]
-                        colors[color_k + 4] = vertex_color[0]
-                        colors[color_k + 5] = vertex_color[1]
-                        colors[color_k + 6] = vertex_color[2]
-                        colors[color_k + 7] = vertex_color[3]
-                        color_k += 8
-
-                        prev_pos = current_pos
-                        prev_gline = gline
-                        gline.gcview_end_vertex = vertex_k // 3
+                if nlines * 3 + 3 > vertices.size:
+                    # These sizes are upper bounds for the rest of the file,
+                    # don't waste memory by doubling them
+                    grow_array(vertices, nlines * 3 + 3, exact = True)
+                    grow_array(colors, nlines * 4 + 4, exact = True)
+
+                if layer_colors:
+                    new_vertices_len = len(layer_vertices)
+                    new_colors_len = 4 * len(layer_colors)
+                    # arc interpolation extra points allocation
+                    grow_array(vertices, vertex_k + new_vertices_len)
+                    grow_array(colors, color_k + new_colors_len)
+
+                    vertices[vertex_k:vertex_k + new_vertices_len] = layer_vertices
+                    vertex_k += new_vertices_len
+                    colors[color_k:color_k + new_colors_len].reshape(-1, 4)[:] = \
+                        color_lut[layer_colors]
+                    color_k += new_colors_len
+                    segment_color_indices.extend(layer_colors)
 
                 if has_movement:
-                    self.layer_stops.append(vertex_k // 3)
+                    self.layer_stops.append(vertex_k // 3 - 1)
                     self.layer_idxs_map[layer_idx] = len(self.layer_stops) - 1
                     self.max_layers = len(self.layer_stops) - 1
                     self.num_layers_to_draw = self.max_layers + 1
@@ -1029,13 +1177,32 @@ class GcodeModelLight(Model):
         for var in ["vertices", "colors", "max_layers",
                     "num_layers_to_draw", "printed_until",
                     "layer_stops", "dims", "only_current",
-                    "layer_idxs_map", "gcode"]:
-            setattr(copy, var, getattr(self, var))
+                    "layer_idxs_map", "segment_color_indices", "gcode"]:
+            setattr(copy, var, shared_view(getattr(self, var)))
         copy.loaded = True
         copy.fully_loaded = True
         copy.initialized = False
         return copy
 
+    def movement_color_lut_ubyte(self):
+        """
+        Return the movement color table as normalized unsigned bytes, the
+        format of the vertex colors: a quarter of the size of floats.
+        """
+        return numpy.around(numpy.array(self.movement_color_lut()) * 255).astype(numpy.uint8)
+
+    def update_colors(self):
+        """Rebuild gl color buffer without loading. Used after color settings edit"""
+        color_lut = self.movement_color_lut_ubyte()
+        color_indices = numpy.frombuffer(self.segment_color_indices, dtype = numpy.uint8)
+        # the origin vertex starts the strip, each segment colors its end
+        colors = numpy.zeros((len(color_indices) + 1, 4), dtype = numpy.uint8)
+        colors[1:] = color_lut[color_indices]
+        colors = colors.ravel()
+        self.vertex_color_buffer = numpy2vbo(colors, usage = GL_DYNAMIC_DRAW,
+                                             use_vbos = self.use_vbos,
+                                             vbo = self.vertex_color_buffer)
+
     # ------------------------------------------------------------------------
     # DRAWING
     # ------------------------------------------------------------------------
@@ -1044,29 +1211,53 @@ class GcodeModelLight(Model):
         with self.lock:
             self.layers_loaded = self.max_layers
             self.initialized = True
-            if self.buffers_created:
-                self.vertex_buffer.delete()
-                self.vertex_color_buffer.delete()
-            self.vertex_buffer = numpy2vbo(self.vertices, use_vbos = self.use_vbos)
-            self.vertex_color_buffer = numpy2vbo(self.colors, use_vbos = self.use_vbos)  # each pair of vertices shares the color
             if self.fully_loaded:
+                # Positions never change once loaded, colors do when the
+                # color settings are edited
+                self.vertex_buffer = numpy2vbo(self.vertices, use_vbos = self.use_vbos,
+                                               vbo = self.vertex_buffer)
+                self.vertex_color_buffer = numpy2vbo(self.colors, usage = GL_DYNAMIC_DRAW,
+                                                     use_vbos = self.use_vbos,
+                                                     vbo = self.vertex_color_buffer)
                 # Delete numpy arrays after creating VBOs after full load
                 self.vertices = None
                 self.colors = None
+            else:
+                # While loading, the arrays are preallocated for the whole
+                # file: only upload what was filled since the last call
+                nvertices = self.layer_stops[-1] + 1
+                self.vertex_buffer = append2vbo(self.vertices, nvertices * 3, self.uploaded_counts[0],
+                                                self.vertex_buffer, use_vbos = self.use_vbos)
+                self.vertex_color_buffer = append2vbo(self.colors, nvertices * 4, self.uploaded_counts[1],
+                                                      self.vertex_color_buffer, use_vbos = self.use_vbos)
+                self.uploaded_counts = (nvertices * 3, nvertices * 4)
             self.buffers_created = True
 
     def display(self, mode_2d=False):
         with self.lock:
-            glPushMatrix()
-            glTranslatef(self.offset_x, self.offset_y, 0)
+            # Models are usually placed by the caller, skip the matrix work
+            # when there is no offset of their own
+            has_offset = self.offset_x or self.offset_y
+            if has_offset:
+                glPushMatrix()
+                glTranslatef(self.offset_x, self.offset_y, 0)
             glEnableClientState(GL_VERTEX_ARRAY)
             glEnableClientState(GL_COLOR_ARRAY)
+            # Segments take the color of their end vertex instead of a blend
+            glPushAttrib(GL_LIGHTING_BIT)
+            glShadeModel(GL_FLAT)
 
             self._display_movements(mode_2d)
 
+            glPopAttrib()
             glDisableClientState(GL_COLOR_ARRAY)
             glDisableClientState(GL_VERTEX_ARRAY)
-            glPopMatrix()
+            if has_offset:
+                glPopMatrix()
+
+    def _draw_segments(self, first, count):
+        if count > 0:
+            glDrawArrays(GL_LINE_STRIP, first, count + 1)
 
     def _display_movements(self, mode_2d=False):
         self.vertex_buffer.bind()
@@ -1078,70 +1269,72 @@ class GcodeModelLight(Model):
 
         self.vertex_color_buffer.bind()
         if has_vbo:
-            glColorPointer(4, GL_FLOAT, 0, None)
+            glColorPointer(4, GL_UNSIGNED_BYTE, 0, None)
         else:
-            glColorPointer(4, GL_FLOAT, 0, self.vertex_color_buffer.ptr)
+            glColorPointer(4, GL_UNSIGNED_BYTE, 0, self.vertex_color_buffer.ptr)
 
         # Prevent race condition by using the number of currently loaded layers
         max_layers = self.layers_loaded
+        num_layers_to_draw = self.num_layers_to_draw
+        printed_until = self.printed_until
+        only_current = self.only_current
+
+        draw_segments = self._draw_segments
 
         start = 0
-        if self.num_layers_to_draw <= max_layers:
-            end_prev_layer = self.layer_stops[self.num_layers_to_draw - 1]
+        if num_layers_to_draw <= max_layers:
+            end_prev_layer = self.layer_stops[num_layers_to_draw - 1]
         else:
             end_prev_layer = -1
-        end = self.layer_stops[min(self.num_layers_to_draw, max_layers)]
-
-        glDisableClientState(GL_COLOR_ARRAY)
-
-        glColor4f(*self.color_printed)
-
-        # Draw printed stuff until end or end_prev_layer
-        cur_end = min(self.printed_until, end)
-        if not self.only_current:
-            if 0 <= end_prev_layer <= cur_end:
-                glDrawArrays(GL_LINES, start, end_prev_layer)
-            elif cur_end >= 0:
-                glDrawArrays(GL_LINES, start, cur_end)
-
-        glEnableClientState(GL_COLOR_ARRAY)
+        end = self.layer_stops[min(num_layers_to_draw, max_layers)]
+
+        # Draw printed stuff until end or end_prev_layer, only switching
+        # to the printed color when there is something to draw
+        cur_end = min(printed_until, end)
+        if not only_current:
+            printed_end = end_prev_layer if 0 <= end_prev_layer <= cur_end else cur_end
+            if printed_end > 0:
+                glDisableClientState(GL_COLOR_ARRAY)
+                glColor4f(*self.color_printed)
+                draw_segments(start, printed_end)
+                glEnableClientState(GL_COLOR_ARRAY)
 
         # Draw nonprinted stuff until end_prev_layer
         start = max(cur_end, 0)
         if end_prev_layer >= start:
-            if not self.only_current:
-                glDrawArrays(GL_LINES, start, end_prev_layer - start)
+            if not only_current:
+                draw_segments(start, end_prev_layer - start)
             cur_end = end_prev_layer
 
         # Draw current layer
         if end_prev_layer >= 0:
             glDisableClientState(GL_COLOR_ARRAY)
 
-            # Backup & increase line width
-            orig_linewidth = (GLfloat)()
-            glGetFloatv(GL_LINE_WIDTH, orig_linewidth)
+            # Backup & increase line width, without querying the current
+            # one back from the driver
+            glPushAttrib(GL_LINE_BIT)
             glLineWidth(2.0)
 
             glColor4f(*self.color_current_printed)
 
             if cur_end > end_prev_layer:
-                glDrawArrays(GL_LINES, end_prev_layer, cur_end - end_prev_layer)
+                draw_segments(end_prev_layer, cur_end - end_prev_layer)
 
             glColor4f(*self.color_current)
 
             if end > cur_end:
-                glDrawArrays(GL_LINES, cur_end, end - cur_end)
+                draw_segments(cur_end, end - cur_end)
 
             # Restore line width
-            glLineWidth(orig_linewidth)
+            glPopAttrib()
 
             glEnableClientState(GL_COLOR_ARRAY)
 
         # Draw non printed stuff until end (if not ending at a given layer)
-        start = max(self.printed_until, 0)
+        start = max(printed_until, 0)
         end = end - start
-        if end_prev_layer < 0 and end > 0 and not self.only_current:
-            glDrawArrays(GL_LINES, start, end)
+        if end_prev_layer < 0 and end > 0 and not only_current:
+            draw_segments(start, end)
 
+        # Both buffers share the GL_ARRAY_BUFFER binding
         self.vertex_buffer.unbind()
-        self.vertex_color_buffer.unbind()
@@ -16,8 +16,7 @@
 from threading import Lock
 import logging
 import traceback
-import numpy
-import numpy.linalg
+import math
 
 import wx
 from wx import glcanvas
@@ -59,6 +58,10 @@ class wxGLPanel(BASE_CLASS):
 
     orbit_control = True
     orthographic = True
+
+    # Rotation axes of the orbit control
+    AXIS_X = (1.0, 0.0, 0.0)
+    AXIS_Z = (0.0, 0.0, 1.0)
     color_background = (0.98, 0.98, 0.78, 1)
     do_lights = True
 
@@ -90,6 +93,14 @@ class wxGLPanel(BASE_CLASS):
             self.canvas = glcanvas.GLCanvas(self, wx.ID_ANY, attribList, pos, size, style)
 
         self.width = self.height = None
+        # Projection matrix and viewport, read back once per reshape for
+        # unprojecting mouse positions
+        self.projection_mat = None
+        self.viewport = None
+        # Reused by get_modelview_mat, only valid until its next call
+        self.modelview_mat = (GLdouble * 16)()
+        # Scale factors mapping window coordinates to [-1, 1]
+        self.inv_half_width = self.inv_half_height = None
 
         self.context = glcanvas.GLContext(self.canvas)
 
@@ -212,6 +223,8 @@ class wxGLPanel(BASE_CLASS):
             return
         self.width = max(float(width), 1.0)
         self.height = max(float(height), 1.0)
+        self.inv_half_width = 2.0 / self.width
+        self.inv_half_height = 2.0 / self.height
         self.OnInitGL(call_reshape = False)
         # print('glViewport', width)
         glViewport(0, 0, width, height)
@@ -223,6 +236,9 @@ class wxGLPanel(BASE_CLASS):
         else:
             gluPerspective(60., float(width) / height, 10.0, 3 * self.dist)
             glTranslatef(0, 0, -self.dist)  # Move back
+        self.projection_mat = (GLdouble * 16)()
+        glGetDoublev(GL_PROJECTION_MATRIX, self.projection_mat)
+        self.viewport = (GLint * 4)(0, 0, width, height)
         glMatrixMode(GL_MODELVIEW)
 
         if not self.mview_initialized:
@@ -336,8 +352,16 @@ class wxGLPanel(BASE_CLASS):
     # ==========================================================================
     # Utils
     # ==========================================================================
+    def get_projection(self):
+        if self.projection_mat is None:
+            self.projection_mat = (GLdouble * 16)()
+            glGetDoublev(GL_PROJECTION_MATRIX, self.projection_mat)
+            self.viewport = (GLint * 4)()
+            glGetIntegerv(GL_VIEWPORT, self.viewport)
+        return self.projection_mat, self.viewport
+
     def get_modelview_mat(self, local_transform):
-        mvmat = (GLdouble * 16)()
+        mvmat = self.modelview_mat
         glGetDoublev(GL_MODELVIEW_MATRIX, mvmat)
         return mvmat
 
@@ -348,29 +372,40 @@ class wxGLPanel(BASE_CLASS):
         # the bed
         # if self.orthographic:
         #    return (x - self.width / 2, y - self.height / 2, 0)
-        pmat = (GLdouble * 16)()
-        mvmat = self.get_modelview_mat(local_transform)
-        viewport = (GLint * 4)()
+        pmat, viewport = self.get_projection()
+        # Positions are always unprojected with the current modelview
+        # matrix, which zooming and panning then modify: building the
+        # local transform matrix first would be wasted work
+        mvmat = self.get_modelview_mat(False)
         px = (GLdouble)()
         py = (GLdouble)()
         pz = (GLdouble)()
-        glGetIntegerv(GL_VIEWPORT, viewport)
-        glGetDoublev(GL_PROJECTION_MATRIX, pmat)
-        glGetDoublev(GL_MODELVIEW_MATRIX, mvmat)
         gluUnProject(x, y, z, mvmat, pmat, viewport, px, py, pz)
         return (px.value, py.value, pz.value)
 
+    def mouse_delta_3d(self, p1, p2, z = 1.0):
+        """Unproject two mouse positions and return the 3D offset between them.
+
+        The matrices are only fetched once for both points."""
+        pmat, viewport = self.get_projection()
+        mvmat = self.get_modelview_mat(False)
+        px = (GLdouble)()
+        py = (GLdouble)()
+        pz = (GLdouble)()
+        gluUnProject(float(p1[0]), self.height - float(p1[1]), z,
+                     mvmat, pmat, viewport, px, py, pz)
+        x1, y1, z1 = px.value, py.value, pz.value
+        gluUnProject(float(p2[0]), self.height - float(p2[1]), z,
+                     mvmat, pmat, viewport, px, py, pz)
+        return (px.value - x1, py.value - y1, pz.value - z1)
+
     def mouse_to_ray(self, x, y, local_transform = False):
         x = float(x)
         y = self.height - float(y)
-        pmat = (GLdouble * 16)()
-        mvmat = (GLdouble * 16)()
-        viewport = (GLint * 4)()
+        pmat, viewport = self.get_projection()
         px = (GLdouble)()
         py = (GLdouble)()
         pz = (GLdouble)()
-        glGetIntegerv(GL_VIEWPORT, viewport)
-        glGetDoublev(GL_PROJECTION_MATRIX, pmat)
         mvmat = self.get_modelview_mat(local_transform)
         gluUnProject(x, y, 1, mvmat, pmat, viewport, px, py, pz)
         ray_far = (px.value, py.value, pz.value)
@@ -380,19 +415,25 @@ class wxGLPanel(BASE_CLASS):
 
     def mouse_to_plane(self, x, y, plane_normal, plane_offset, local_transform = False):
         # Ray/plane intersection
-        ray_near, ray_far = self.mouse_to_ray(x, y, local_transform)
-        ray_near = numpy.array(ray_near)
-        ray_far = numpy.array(ray_far)
-        ray_dir = ray_far - ray_near
-        ray_dir = ray_dir / numpy.linalg.norm(ray_dir)
-        plane_normal = numpy.array(plane_normal)
-        q = ray_dir.dot(plane_normal)
+        # Plain float math: numpy calls on 3 element vectors cost much more
+        # than the arithmetic itself
+        (near_x, near_y, near_z), (far_x, far_y, far_z) = \
+            self.mouse_to_ray(x, y, local_transform)
+        normal_x, normal_y, normal_z = plane_normal
+        dir_x = far_x - near_x
+        dir_y = far_y - near_y
+        dir_z = far_z - near_z
+        norm = math.sqrt(dir_x * dir_x + dir_y * dir_y + dir_z * dir_z)
+        dir_x /= norm
+        dir_y /= norm
+        dir_z /= norm
+        q = dir_x * normal_x + dir_y * normal_y + dir_z * normal_z
         if q == 0:
             return None
-        t = - (ray_near.dot(plane_normal) + plane_offset) / q
+        t = - (near_x * normal_x + near_y * normal_y + near_z * normal_z + plane_offset) / q
         if t < 0:
             return None
-        return ray_near + t * ray_dir
+        return (near_x + t * dir_x, near_y + t * dir_y, near_z + t * dir_z)
 
     def zoom(self, factor, to = None):
         glMatrixMode(GL_MODELVIEW)
@@ -420,11 +461,11 @@ class wxGLPanel(BASE_CLASS):
     def orbit(self, p1x, p1y, p2x, p2y):
         rz = p2x-p1x
         self.angle_z-=rz
-        rotz = axis_to_quat([0.0,0.0,1.0],self.angle_z)
+        rotz = axis_to_quat(self.AXIS_Z, self.angle_z)
 
         rx = p2y-p1y
         self.angle_x+=rx
-        rota = axis_to_quat([1.0,0.0,0.0],self.angle_x)
+        rota = axis_to_quat(self.AXIS_X, self.angle_x)
         return mulquat(rotz,rota)
 
     def handle_rotation(self, event):
@@ -434,16 +475,17 @@ class wxGLPanel(BASE_CLASS):
         else:
             p1 = self.initpos
             p2 = event.GetPosition() * content_scale_factor
-            sz = self.GetClientSize() * content_scale_factor
-            p1x = p1[0] / (sz[0] / 2) - 1
-            p1y = 1 - p1[1] / (sz[1] / 2)
-            p2x = p2[0] / (sz[0] / 2) - 1
-            p2y = 1 - p2[1] / (sz[1] / 2)
-            quat = trackball(p1x, p1y, p2x, p2y, self.dist / 250.0)
+            inv_half_width = self.inv_half_width
+            inv_half_height = self.inv_half_height
+            p1x = p1[0] * inv_half_width - 1
+            p1y = 1 - p1[1] * inv_half_height
+            p2x = p2[0] * inv_half_width - 1
+            p2y = 1 - p2[1] * inv_half_height
             with self.rot_lock:
                 if self.orbit_control:
                     self.basequat = self.orbit(p1x, p1y, p2x, p2y)
                 else:
+                    quat = trackball(p1x, p1y, p2x, p2y, self.dist / 250.0)
                     self.basequat = mulquat(self.basequat, quat)
             self.initpos = p2
 
@@ -455,9 +497,8 @@ class wxGLPanel(BASE_CLASS):
             p1 = self.initpos
             p2 = event.GetPosition() * content_scale_factor
             if self.orthographic:
-                x1, y1, _ = self.mouse_to_3d(p1[0], p1[1])
-                x2, y2, _ = self.mouse_to_3d(p2[0], p2[1])
-                glTranslatef(x2 - x1, y2 - y1, 0)
+                dx, dy, _ = self.mouse_delta_3d(p1, p2)
+                glTranslatef(dx, dy, 0)
             else:
                 glTranslatef(p2[0] - p1[0], -(p2[1] - p1[1]), 0)
             self.initpos = p2
@@ -14,6 +14,7 @@
 # along with Printrun.  If not, see <http://www.gnu.org/licenses/>.
 
 import math
+from functools import lru_cache
 
 from pyglet.gl import GLdouble
 
@@ -28,12 +29,14 @@ def trackball(p1x, p1y, p2x, p2y, r):
     if p1x == p2x and p1y == p2y:
         return [0.0, 0.0, 0.0, 1.0]
 
-    p1 = [p1x, p1y, project_to_sphere(TRACKBALLSIZE, p1x, p1y)]
-    p2 = [p2x, p2y, project_to_sphere(TRACKBALLSIZE, p2x, p2y)]
-    a = cross(p2, p1)
+    p1z = project_to_sphere(TRACKBALLSIZE, p1x, p1y)
+    p2z = project_to_sphere(TRACKBALLSIZE, p2x, p2y)
+    a = cross((p2x, p2y, p2z), (p1x, p1y, p1z))
 
-    d = map(lambda x, y: x - y, p1, p2)
-    t = math.sqrt(sum(x * x for x in d)) / (2.0 * TRACKBALLSIZE)
+    dx = p1x - p2x
+    dy = p1y - p2y
+    dz = p1z - p2z
+    t = math.sqrt(dx * dx + dy * dy + dz * dz) / (2.0 * TRACKBALLSIZE)
 
     if t > 1.0:
         t = 1.0
@@ -44,32 +47,41 @@ def trackball(p1x, p1y, p2x, p2y, r):
     return axis_to_quat(a, phi)
 
 def axis_to_quat(a, phi):
-    lena = math.sqrt(sum(x * x for x in a))
-    q = [x * (1 / lena) for x in a]
-    q = [x * math.sin(phi / 2.0) for x in q]
-    q.append(math.cos(phi / 2.0))
-    return q
+    ax, ay, az = a
+    scale = math.sin(phi / 2.0) / math.sqrt(ax * ax + ay * ay + az * az)
+    return [ax * scale, ay * scale, az * scale, math.cos(phi / 2.0)]
 
 def build_rotmatrix(q):
+    # The view only rotates while dragging, reuse the matrix of an unchanged
+    # quaternion on every other redraw. The result must not be modified.
+    return _build_rotmatrix(tuple(q))
+
+@lru_cache(maxsize = 8)
+def _build_rotmatrix(q):
+    x, y, z, w = q
+    xx = x * x
+    yy = y * y
+    zz = z * z
+    xy = x * y
+    yz = y * z
+    zx = z * x
+    xw = x * w
+    yw = y * w
+    zw = z * w
+    # Zero initialized: only the rotation part and m[15] need to be set
     m = (GLdouble * 16)()
-    m[0] = 1.0 - 2.0 * (q[1] * q[1] + q[2] * q[2])
-    m[1] = 2.0 * (q[0] * q[1] - q[2] * q[3])
-    m[2] = 2.0 * (q[2] * q[0] + q[1] * q[3])
-    m[3] = 0.0
-
-    m[4] = 2.0 * (q[0] * q[1] + q[2] * q[3])
-    m[5] = 1.0 - 2.0 * (q[2] * q[2] + q[0] * q[0])
-    m[6] = 2.0 * (q[1] * q[2] - q[0] * q[3])
-    m[7] = 0.0
-
-    m[8] = 2.0 * (q[2] * q[0] - q[1] * q[3])
-    m[9] = 2.0 * (q[1] * q[2] + q[0] * q[3])
-    m[10] = 1.0 - 2.0 * (q[1] * q[1] + q[0] * q[0])
-    m[11] = 0.0
-
-    m[12] = 0.0
-    m[13] = 0.0
-    m[14] = 0.0
+    m[0] = 1.0 - 2.0 * (yy + zz)
+    m[1] = 2.0 * (xy - zw)
+    m[2] = 2.0 * (zx + yw)
+
+    m[4] = 2.0 * (xy + zw)
+    m[5] = 1.0 - 2.0 * (zz + xx)
+    m[6] = 2.0 * (yz - xw)
+
+    m[8] = 2.0 * (zx - yw)
+    m[9] = 2.0 * (yz + xw)
+    m[10] = 1.0 - 2.0 * (yy + xx)
+
     m[15] = 1.0
     return m
 
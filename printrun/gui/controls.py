@@ -13,6 +13,8 @@
 # You should have received a copy of the GNU General Public License
 # along with Printrun.  If not, see <http://www.gnu.org/licenses/>.
 
+import functools
+
 import wx
 
 from .xybuttons import XYButtons, XYButtonsMini
@@ -34,6 +36,22 @@ class XYZControlsSizer(wx.GridBagSizer):
         root.zb = ZButtons(parentpanel, root.moveZ, root.bgcolor)
         self.Add(root.zb, pos = (0, 2), flag = wx.ALIGN_CENTER)
 
+@functools.lru_cache(maxsize = 8)
+def temperature_labels(temp, choices):
+    """
+    Return the sorted labels of the (name, temperature) presets in choices,
+    with temp added as a user preset if needed, and the index of temp.
+    Cached, as the presets rarely change between rebuilds of the controls.
+    """
+    choices = [(float(p[1]), p[0]) for p in choices]
+    if temp not in [value for value, name in choices]:
+        choices.append((temp, 'user'))
+
+    choices.sort()
+    labels = [f"{value} ({name})" for value, name in choices]
+    # temp is always among the choices at this point
+    return labels, [value for value, name in choices].index(temp)
+
 def add_extra_controls(self, root, parentpanel, extra_buttons = None, mini_mode = False):
     standalone_mode = extra_buttons is not None
     base_line = 1 if standalone_mode else 2
@@ -114,16 +132,11 @@ def add_extra_controls(self, root, parentpanel, extra_buttons = None, mini_mode
         pos_mapping["efeed_val"] = (1, 2)
         pos_mapping["efeed_unit"] = (1, 3)
 
-    def add(name, widget, *args, **kwargs):
-        kwargs["pos"] = pos_mapping[name]
-        if name in span_mapping:
-            kwargs["span"] = span_mapping[name]
-        if "container" in kwargs:
-            container = kwargs["container"]
-            del kwargs["container"]
-        else:
+    def add(name, widget, container = None, **kwargs):
+        if container is None:
             container = self
-        container.Add(widget, *args, **kwargs)
+        container.Add(widget, pos = pos_mapping[name],
+                      span = span_mapping.get(name, wx.DefaultSpan), **kwargs)
 
     # Hotend & bed temperatures #
 
@@ -131,7 +144,6 @@ def add_extra_controls(self, root, parentpanel, extra_buttons = None, mini_mode
     add("htemp_label", wx.StaticText(parentpanel, -1, _("Heat:")), flag = wx.ALIGN_CENTER_VERTICAL | wx.ALIGN_RIGHT)
 
     root.settoff = make_button(parentpanel, _("Off"), lambda e: root.do_settemp("0.0"), _("Switch Hotend Off"), size = (38, -1), style = wx.BU_EXACTFIT)
-    root.printerControls.append(root.settoff)
     add("htemp_off", root.settoff)
 
     root.htemp = wx.ComboBox(parentpanel, style = wx.CB_DROPDOWN, size = (115, -1))
@@ -140,14 +152,12 @@ def add_extra_controls(self, root, parentpanel, extra_buttons = None, mini_mode
 
     add("htemp_val", root.htemp)
     root.settbtn = make_button(parentpanel, _("Set"), root.do_settemp, _("Switch Hotend On"), size = (38, -1), style = wx.BU_EXACTFIT)
-    root.printerControls.append(root.settbtn)
     add("htemp_set", root.settbtn, flag = wx.EXPAND)
 
     # Bed temp
     add("btemp_label", wx.StaticText(parentpanel, -1, _("Bed:")), flag = wx.ALIGN_CENTER_VERTICAL | wx.ALIGN_RIGHT)
 
     root.setboff = make_button(parentpanel, _("Off"), lambda e: root.do_bedtemp("0.0"), _("Switch Heated Bed Off"), size = (38, -1), style = wx.BU_EXACTFIT)
-    root.printerControls.append(root.setboff)
     add("btemp_off", root.setboff)
 
     root.btemp = wx.ComboBox(parentpanel, style = wx.CB_DROPDOWN, size = (115, -1))
@@ -156,21 +166,29 @@ def add_extra_controls(self, root, parentpanel, extra_buttons = None, mini_mode
     add("btemp_val", root.btemp)
 
     root.setbbtn = make_button(parentpanel, _("Set"), root.do_bedtemp, _("Switch Heated Bed On"), size = (38, -1), style = wx.BU_EXACTFIT)
-    root.printerControls.append(root.setbbtn)
     add("btemp_set", root.setbbtn, flag = wx.EXPAND)
 
     def set_labeled(temp, choices, widget):
-        choices = [(float(p[1]), p[0]) for p in choices.items()]
-        if not next((1 for p in choices if p[0] == temp), False):
-            choices.append((temp, 'user'))
-
-        choices = sorted(choices)
-        widget.Items = ['%s (%s)'%tl for tl in choices]
-        widget.Selection = next((i for i, tl in enumerate(choices) if tl[0] == temp), -1)
+        labels, selection = temperature_labels(temp, tuple(choices.items()))
+        widget.Set(labels)
+        widget.SetSelection(selection)
 
     set_labeled(root.settings.last_bed_temperature, root.bedtemps, root.btemp)
     set_labeled(root.settings.last_temperature, root.temps, root.htemp)
 
+    def link_slider(slider, spin, setbtn):
+        # Keep the slider and its spin control in sync, and flag the
+        # Set button until the new value is sent
+        def on_spin(event):
+            setbtn.SetBackgroundColour("red")
+            slider.SetValue(int(spin.GetValue()))
+        spin.Bind(wx.EVT_SPINCTRLDOUBLE, on_spin)
+
+        def on_scroll(event):
+            setbtn.SetBackgroundColour("red")
+            spin.SetValue(slider.GetValue())
+        slider.Bind(wx.EVT_SCROLL, on_scroll)
+
     # Speed control #
     speedpanel = root.newPanel(parentpanel)
     speedsizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -189,22 +207,11 @@ def add_extra_controls(self, root, parentpanel, extra_buttons = None, mini_mode
         root.do_setspeed()
         root.speed_setbtn.SetBackgroundColour(wx.NullColour)
     root.speed_setbtn = make_button(speedpanel, _("Set"), speedslider_set, _("Set print speed factor"), size = (38, -1), style = wx.BU_EXACTFIT)
-    root.printerControls.append(root.speed_setbtn)
     speedsizer.Add(root.speed_setbtn, flag = wx.ALIGN_CENTER)
     speedpanel.SetSizer(speedsizer)
     add("speedcontrol", speedpanel, flag = wx.EXPAND)
 
-    def speedslider_spin(event):
-        value = root.speed_spin.GetValue()
-        root.speed_setbtn.SetBackgroundColour("red")
-        root.speed_slider.SetValue(int(value))
-    root.speed_spin.Bind(wx.EVT_SPINCTRLDOUBLE, speedslider_spin)
-
-    def speedslider_scroll(event):
-        value = root.speed_slider.GetValue()
-        root.speed_setbtn.SetBackgroundColour("red")
-        root.speed_spin.SetValue(value)
-    root.speed_slider.Bind(wx.EVT_SCROLL, speedslider_scroll)
+    link_slider(root.speed_slider, root.speed_spin, root.speed_setbtn)
 
     # Flow control #
     flowpanel = root.newPanel(parentpanel)
@@ -223,22 +230,15 @@ def add_extra_controls(self, root, parentpanel, extra_buttons = None, mini_mode
         root.do_setflow()
         root.flow_setbtn.SetBackgroundColour(wx.NullColour)
     root.flow_setbtn = make_button(flowpanel, _("Set"), flowslider_set, _("Set print flow factor"), size = (38, -1), style = wx.BU_EXACTFIT)
-    root.printerControls.append(root.flow_setbtn)
     flowsizer.Add(root.flow_setbtn, flag = wx.ALIGN_CENTER)
     flowpanel.SetSizer(flowsizer)
     add("flowcontrol", flowpanel, flag = wx.EXPAND)
 
-    def flowslider_spin(event):
-        value = root.flow_spin.GetValue()
-        root.flow_setbtn.SetBackgroundColour("red")
-        root.flow_slider.SetValue(int(value))
-    root.flow_spin.Bind(wx.EVT_SPINCTRLDOUBLE, flowslider_spin)
+    link_slider(root.flow_slider, root.flow_spin, root.flow_setbtn)
 
-    def flowslider_scroll(event):
-        value = root.flow_slider.GetValue()
-        root.flow_setbtn.SetBackgroundColour("red")
-        root.flow_spin.SetValue(value)
-    root.flow_slider.Bind(wx.EVT_SCROLL, flowslider_scroll)
+    # Buttons which need a connected printer
+    root.printerControls.extend((root.settoff, root.settbtn, root.setboff, root.setbbtn,
+                                 root.speed_setbtn, root.flow_setbtn))
 
     # Temperature gauges #
 
@@ -274,13 +274,23 @@ def add_extra_controls(self, root, parentpanel, extra_buttons = None, mini_mode
     # Temperature (M105) feedback display #
     root.tempdisp = wx.StaticText(parentpanel, -1, "", style = wx.ST_NO_AUTORESIZE)
 
+    tempdisp_wrap_width = None
+
+    def wrap_tempdisp():
+        nonlocal tempdisp_wrap_width
+        tempdisp_wrap_width = root.tempdisp.GetSize().width
+        root.tempdisp.Wrap(tempdisp_wrap_width)
+
     def on_tempdisp_size(evt):
-        root.tempdisp.Wrap(root.tempdisp.GetSize().width)
+        # Wrapping only depends on the width: the height change made by
+        # tempdisp_setlabel after each report doesn't need another wrap
+        if root.tempdisp.GetSize().width != tempdisp_wrap_width:
+            wrap_tempdisp()
     root.tempdisp.Bind(wx.EVT_SIZE, on_tempdisp_size)
 
     def tempdisp_setlabel(label):
         wx.StaticText.SetLabel(root.tempdisp, label)
-        root.tempdisp.Wrap(root.tempdisp.GetSize().width)
+        wrap_tempdisp()
         root.tempdisp.SetSize((-1, root.tempdisp.GetBestSize().height))
     root.tempdisp.SetLabel = tempdisp_setlabel
     add("tempdisp", root.tempdisp, flag = wx.EXPAND)
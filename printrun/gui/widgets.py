@@ -19,32 +19,33 @@ import platform  # Used by get_space() for platform specific spacing
 import logging
 import wx
 
+# Spacing values are fixed for the session, so the table is built once
+# with the platform specific overrides applied
+spacing_values = {
+    'major': 12,  # e.g. outer border of dialog boxes
+    'minor': 8,  # e.g. border of inner elements
+    'mini': 4,
+    'stddlg': 4,  # Border around std dialog buttons.
+    'stddlg-frame': 8,  # Border around std dialog buttons when used with frames.
+    'staticbox': 0,  # Border between StaticBoxSizers and the elements inside.
+    'settings': 16,  # How wide setting elements can be (multiples of this)
+    'none': 0
+}
+
+# Platform specific overrides, Windows
+if platform.system() == 'Windows':
+    spacing_values['stddlg'] = 8
+    spacing_values['staticbox'] = 4
+
+# Platform specific overrides, macOS
+if platform.system() == 'Darwin':
+    spacing_values['stddlg-frame'] = 12
+
 def get_space(key: str) -> int:
     '''
     Takes key (str), returns spacing value (int).
     Provides correct spacing in pixel for borders and sizers.
     '''
-
-    spacing_values = {
-        'major': 12,  # e.g. outer border of dialog boxes
-        'minor': 8,  # e.g. border of inner elements
-        'mini': 4,
-        'stddlg': 4,  # Border around std dialog buttons.
-        'stddlg-frame': 8,  # Border around std dialog buttons when used with frames.
-        'staticbox': 0,  # Border between StaticBoxSizers and the elements inside.
-        'settings': 16,  # How wide setting elements can be (multiples of this)
-        'none': 0
-    }
-
-    # Platform specific overrides, Windows
-    if platform.system() == 'Windows':
-        spacing_values['stddlg'] = 8
-        spacing_values['staticbox'] = 4
-
-    # Platform specific overrides, macOS
-    if platform.system() == 'Darwin':
-        spacing_values['stddlg-frame'] = 12
-
     try:
         return spacing_values[key]
     except KeyError:
@@ -149,9 +149,8 @@ class PlaterPanel(wx.Panel):
                     if event.ShiftDown():
                         p1 = self.initpos
                         p2 = event.GetPosition()
-                        x1, y1, _ = self.mouse_to_3d(p1[0], p1[1])
-                        x2, y2, _ = self.mouse_to_3d(p2[0], p2[1])
-                        self.parent.move_shape((x2 - x1, y2 - y1))
+                        dx, dy, _ = self.mouse_delta_3d(p1, p2)
+                        self.parent.move_shape((dx, dy))
                         self.initpos = p2
                     else:
                         orig_handler(event)
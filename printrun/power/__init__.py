@@ -97,7 +97,15 @@ try:
         else:
             p.nice = nice
 
-    if platform.system() != "Windows":
+    # The platform is fixed for the session, pick the priority functions
+    # once instead of checking it on every print start and stop
+    if platform.system() == "Windows":
+        def set_priority():
+            set_nice(psutil.HIGH_PRIORITY_CLASS)
+
+        def reset_priority():
+            set_nice(psutil.NORMAL_PRIORITY_CLASS)
+    else:
         import resource
         if hasattr(psutil, "RLIMIT_NICE"):
             nice_limit, _ = resource.getrlimit(psutil.RLIMIT_NICE)
@@ -117,17 +125,11 @@ try:
                     pass
             set_nice(orig_nice, p)
 
-    def set_priority():
-        if platform.system() == "Windows":
-            set_nice(psutil.HIGH_PRIORITY_CLASS)
-        else:
+        def set_priority():
             if high_priority_nice < 0:
                 set_nice(high_priority_nice)
 
-    def reset_priority():
-        if platform.system() == "Windows":
-            set_nice(psutil.NORMAL_PRIORITY_CLASS)
-        else:
+        def reset_priority():
             if high_priority_nice < 0:
                 set_nice(0)
 
@@ -68,6 +68,149 @@ from .settings import wxSetting, HiddenSetting, StringSetting, SpinSetting, \
 from printrun import gcoder
 from .pronsole import REPORT_NONE, REPORT_POS, REPORT_TEMP, REPORT_MANUAL
 
+# Licence and credits shown in the about dialog
+LICENCE = """\
+Printrun is free software: you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+Printrun is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Printrun. If not, see <http://www.gnu.org/licenses/>."""
+
+DEVELOPERS = (
+    'Kliment Yanev @kliment (code)',
+    'Guillaume Seguin @iXce (code)',
+    '@DivingDuck (code)',
+    '@volconst (code)',
+    'Rock Storm @rockstorm101 (code, packaging)',
+    'Miro Hrončok @hroncok (code, packaging)',
+    'Rob Gilson @D1plo1d (code)',
+    'Gary Hodgson @garyhodgson (code)',
+    'Neofelis @neofelis2X (code)',
+    'Duane Johnson (code,graphics)',
+    'Alessandro Ranellucci @alranel (code)',
+    'Travis Howse @tjhowse (code)',
+    'edef (code)',
+    'Steven Devijver (code)',
+    'Christopher Keller (code)',
+    'Igor Yeremin (code)',
+    'Jeremy Hammett @jezmy (code)',
+    'Spencer Bliven (code)',
+    'Václav \'ax\' Hůla  @AxTheB (code)',
+    'Félix Sipma (code)',
+    'Maja M. @SparkyCola (code)',
+    'Francesco Santini @fsantini (code)',
+    'Cristopher Olah @colah (code)',
+    'Jeremy Kajikawa (code)',
+    'Markus Hitter (code)',
+    'SkateBoss (code)',
+    'Kaz Walker (code)',
+    'Brendan Erwin (documentation)',
+    'Elias (code)',
+    'Jordan Miller (code)',
+    'Mikko Sivulainen (code)',
+    'Clarence Risher (code)',
+    'Guillaume Revaillot (code)',
+    'John Tapsell (code)',
+    'Youness Alaoui (code)',
+    '@eldir (code)',
+    '@hg42 (code)',
+    '@jglauche (code, documentation)',
+    'Ahmet Cem TURAN @ahmetcemturan (icons, code)',
+    'Andrew Dalgleish (code)',
+    'Benny (documentation)',
+    'Chillance (code)',
+    'Ilya Novoselov (code)',
+    'Joeri Hendriks (code)',
+    'Kevin Cole (code)',
+    'pinaise (code)',
+    'Dratone (code)',
+    'ERoth3 (code)',
+    'Erik Zalm (code)',
+    'Felipe Corrêa da Silva Sanches (code)',
+    'Geordie Bilkey (code)',
+    'Ken Aaker (code)',
+    'Lawrence (documentation)',
+    'Loxgen (code)',
+    'Matthias Urlichs (code)',
+    'N Oliver (code)',
+    '@nexus511 (code)',
+    'Sergey Shepelev (code)',
+    'Simon Maillard (code)',
+    'Vanessa Dannenberg (code)',
+    '@beardface (code)',
+    '@hurzl (code)',
+    'Justin Hawkins @beardface (code)',
+    'siorai (documentation)',
+    'tobbelobb (code)',
+    '5ilver (packaging)',
+    'Alexander Hiam (code)',
+    'Alexander Zangerl (code)',
+    'Cameron Currie (code)',
+    'Chris DeLuca (documentation)',
+    'Colin Gilgenbach (code)',
+    'DanLipsitt (code)',
+    'Daniel Holth (code)',
+    'Denis B (code)',
+    'Erik Jonsson (code)',
+    'Felipe Acebes (code)',
+    'Florian Gilcher (code)',
+    'Henrik Brix Andersen (code)',
+    'Jan Wildeboer (documentation)',
+    'Javier Rios (code)',
+    'Jay Proulx (code)',
+    'Jim Morris (code)',
+    'Kyle Evans (code)',
+    'Lenbok (code)',
+    'Lukas Erlacher (code)',
+    'Michael Andresen @blddk (code)',
+    'NeoTheFox (code)',
+    'Nicolas Dandrimont (documentation)',
+    'OhmEye (code)',
+    'OliverEngineer (code)',
+    'Paul Telfort (code)',
+    'Sebastian \'Swift Geek\' Grzywna (code)',
+    'Senthil (documentation)',
+    'Sigma-One (code)',
+    'Spacexula (documentation)',
+    'Stefan Glatzel (code)',
+    'Stefanowicz (code)',
+    'Steven (code)',
+    'Tyler Hovanec (documentation)',
+    'Xabi Xab (code)',
+    'Xoan Sampaiño (code)',
+    'Yuri D\'Elia (code)',
+    'drf5n (code)',
+    'evilB (documentation)',
+    'fieldOfView (code)',
+    'jbh (code)',
+    'kludgineer (code)',
+    'l4nce0 (code)',
+    'palob (code)',
+    'russ (code)',
+)
+
+ARTISTS = (
+    'Ahmet Cem TURAN @ahmetcemturan (icons, code)',
+    'Duane Johnson (code,graphics)',
+)
+
+TRANSLATORS = (
+    'freddii (German translation)',
+    'Christian Metzen @metzench (German translation)',
+    'Cyril Laguilhon-Debat (French translation)',
+    '@AvagSayan (Armenian translation)',
+    'Jonathan Marsden (French translation)',
+    'Ruben Lubbes (NL translation)',
+    'aboobed (Arabic translation)',
+    'Alessandro Ranellucci @alranel (Italian translation)',
+)
+
 def format_length(mm, fractional=2):
     if mm <= 10:
         units = mm
@@ -918,158 +1061,25 @@ class PronterWindow(MainWindow, pronsole.pronsole):
 
         info = wx.adv.AboutDialogInfo()
 
-        info.SetIcon(wx.Icon(iconfile("pronterface.png"), wx.BITMAP_TYPE_PNG))
+        # Reuse the icon decoded for the main window
+        info.SetIcon(self.GetIcon())
         info.SetName('Printrun')
         info.SetVersion(printcore.__version__)
 
-        description = _("Printrun is a pure Python 3D printing"
-                        " (and other types of CNC) host software.")
-
-        description += "\n\n" + \
-                       _("%.02fmm of filament have been extruded during prints") \
-                       % self.settings.total_filament_used
+        description = "\n\n".join((
+            _("Printrun is a pure Python 3D printing"
+              " (and other types of CNC) host software."),
+            _("%.02fmm of filament have been extruded during prints")
+            % self.settings.total_filament_used))
 
         info.SetDescription(description)
         info.SetCopyright('(C) 2011 - 2024')
         info.SetWebSite('https://github.com/kliment/Printrun')
 
-        licence = """\
-Printrun is free software: you can redistribute it and/or modify it under the
-terms of the GNU General Public License as published by the Free Software
-Foundation, either version 3 of the License, or (at your option) any later
-version.
-
-Printrun is distributed in the hope that it will be useful, but WITHOUT ANY
-WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
-PARTICULAR PURPOSE.  See the GNU General Public License for more details.
-
-You should have received a copy of the GNU General Public License along with
-Printrun. If not, see <http://www.gnu.org/licenses/>."""
-
-        info.SetLicence(licence)
-        info.AddDeveloper('Kliment Yanev @kliment (code)')
-        info.AddDeveloper('Guillaume Seguin @iXce (code)')
-        info.AddDeveloper('@DivingDuck (code)')
-        info.AddDeveloper('@volconst (code)')
-        info.AddDeveloper('Rock Storm @rockstorm101 (code, packaging)')
-        info.AddDeveloper('Miro Hrončok @hroncok (code, packaging)')
-        info.AddDeveloper('Rob Gilson @D1plo1d (code)')
-        info.AddDeveloper('Gary Hodgson @garyhodgson (code)')
-        info.AddDeveloper('Neofelis @neofelis2X (code)')
-        info.AddDeveloper('Duane Johnson (code,graphics)')
-        info.AddDeveloper('Alessandro Ranellucci @alranel (code)')
-        info.AddDeveloper('Travis Howse @tjhowse (code)')
-        info.AddDeveloper('edef (code)')
-        info.AddDeveloper('Steven Devijver (code)')
-        info.AddDeveloper('Christopher Keller (code)')
-        info.AddDeveloper('Igor Yeremin (code)')
-        info.AddDeveloper('Jeremy Hammett @jezmy (code)')
-        info.AddDeveloper('Spencer Bliven (code)')
-        info.AddDeveloper('Václav \'ax\' Hůla  @AxTheB (code)')
-        info.AddDeveloper('Félix Sipma (code)')
-        info.AddDeveloper('Maja M. @SparkyCola (code)')
-        info.AddDeveloper('Francesco Santini @fsantini (code)')
-        info.AddDeveloper('Cristopher Olah @colah (code)')
-
-        info.AddDeveloper('Jeremy Kajikawa (code)')
-        info.AddDeveloper('Markus Hitter (code)')
-        info.AddDeveloper('SkateBoss (code)')
-        info.AddDeveloper('Kaz Walker (code)')
-        info.AddDeveloper('Brendan Erwin (documentation)')
-        info.AddDeveloper('Elias (code)')
-        info.AddDeveloper('Jordan Miller (code)')
-        info.AddDeveloper('Mikko Sivulainen (code)')
-        info.AddDeveloper('Clarence Risher (code)')
-        info.AddDeveloper('Guillaume Revaillot (code)')
-        info.AddDeveloper('John Tapsell (code)')
-        info.AddDeveloper('Youness Alaoui (code)')
-        info.AddDeveloper('@eldir (code)')
-        info.AddDeveloper('@hg42 (code)')
-        info.AddDeveloper('@jglauche (code, documentation)')
-        info.AddDeveloper('Ahmet Cem TURAN @ahmetcemturan (icons, code)')
-        info.AddDeveloper('Andrew Dalgleish (code)')
-        info.AddDeveloper('Benny (documentation)')
-        info.AddDeveloper('Chillance (code)')
-        info.AddDeveloper('Ilya Novoselov (code)')
-        info.AddDeveloper('Joeri Hendriks (code)')
-        info.AddDeveloper('Kevin Cole (code)')
-        info.AddDeveloper('pinaise (code)')
-        info.AddDeveloper('Dratone (code)')
-        info.AddDeveloper('ERoth3 (code)')
-        info.AddDeveloper('Erik Zalm (code)')
-        info.AddDeveloper('Felipe Corrêa da Silva Sanches (code)')
-        info.AddDeveloper('Geordie Bilkey (code)')
-        info.AddDeveloper('Ken Aaker (code)')
-        info.AddDeveloper('Lawrence (documentation)')
-        info.AddDeveloper('Loxgen (code)')
-        info.AddDeveloper('Matthias Urlichs (code)')
-        info.AddDeveloper('N Oliver (code)')
-        info.AddDeveloper('@nexus511 (code)')
-        info.AddDeveloper('Sergey Shepelev (code)')
-        info.AddDeveloper('Simon Maillard (code)')
-        info.AddDeveloper('Vanessa Dannenberg (code)')
-        info.AddDeveloper('@beardface (code)')
-        info.AddDeveloper('@hurzl (code)')
-        info.AddDeveloper('Justin Hawkins @beardface (code)')
-        info.AddDeveloper('siorai (documentation)')
-        info.AddDeveloper('tobbelobb (code)')
-        info.AddDeveloper('5ilver (packaging)')
-        info.AddDeveloper('Alexander Hiam (code)')
-        info.AddDeveloper('Alexander Zangerl (code)')
-        info.AddDeveloper('Cameron Currie (code)')
-        info.AddDeveloper('Chris DeLuca (documentation)')
-        info.AddDeveloper('Colin Gilgenbach (code)')
-        info.AddDeveloper('DanLipsitt (code)')
-        info.AddDeveloper('Daniel Holth (code)')
-        info.AddDeveloper('Denis B (code)')
-        info.AddDeveloper('Erik Jonsson (code)')
-        info.AddDeveloper('Felipe Acebes (code)')
-        info.AddDeveloper('Florian Gilcher (code)')
-        info.AddDeveloper('Henrik Brix Andersen (code)')
-        info.AddDeveloper('Jan Wildeboer (documentation)')
-        info.AddDeveloper('Javier Rios (code)')
-        info.AddDeveloper('Jay Proulx (code)')
-        info.AddDeveloper('Jim Morris (code)')
-        info.AddDeveloper('Kyle Evans (code)')
-        info.AddDeveloper('Lenbok (code)')
-        info.AddDeveloper('Lukas Erlacher (code)')
-        info.AddDeveloper('Michael Andresen @blddk (code)')
-        info.AddDeveloper('NeoTheFox (code)')
-        info.AddDeveloper('Nicolas Dandrimont (documentation)')
-        info.AddDeveloper('OhmEye (code)')
-        info.AddDeveloper('OliverEngineer (code)')
-        info.AddDeveloper('Paul Telfort (code)')
-        info.AddDeveloper('Sebastian \'Swift Geek\' Grzywna (code)')
-        info.AddDeveloper('Senthil (documentation)')
-        info.AddDeveloper('Sigma-One (code)')
-        info.AddDeveloper('Spacexula (documentation)')
-        info.AddDeveloper('Stefan Glatzel (code)')
-        info.AddDeveloper('Stefanowicz (code)')
-        info.AddDeveloper('Steven (code)')
-        info.AddDeveloper('Tyler Hovanec (documentation)')
-        info.AddDeveloper('Xabi Xab (code)')
-        info.AddDeveloper('Xoan Sampaiño (code)')
-        info.AddDeveloper('Yuri D\'Elia (code)')
-        info.AddDeveloper('drf5n (code)')
-        info.AddDeveloper('evilB (documentation)')
-        info.AddDeveloper('fieldOfView (code)')
-        info.AddDeveloper('jbh (code)')
-        info.AddDeveloper('kludgineer (code)')
-        info.AddDeveloper('l4nce0 (code)')
-        info.AddDeveloper('palob (code)')
-        info.AddDeveloper('russ (code)')
-
-        info.AddArtist('Ahmet Cem TURAN @ahmetcemturan (icons, code)')
-        info.AddArtist('Duane Johnson (code,graphics)')
-
-        info.AddTranslator('freddii (German translation)')
-        info.AddTranslator('Christian Metzen @metzench (German translation)')
-        info.AddTranslator('Cyril Laguilhon-Debat (French translation)')
-        info.AddTranslator('@AvagSayan (Armenian translation)')
-        info.AddTranslator('Jonathan Marsden (French translation)')
-        info.AddTranslator('Ruben Lubbes (NL translation)')
-        info.AddTranslator('aboobed (Arabic translation)')
-        info.AddTranslator('Alessandro Ranellucci @alranel (Italian translation)')
+        info.SetLicence(LICENCE)
+        info.SetDevelopers(list(DEVELOPERS))
+        info.SetArtists(list(ARTISTS))
+        info.SetTranslators(list(TRANSLATORS))
 
         wx.adv.AboutBox(info)
 
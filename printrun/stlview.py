@@ -17,6 +17,7 @@
 
 import wx
 import time
+from itertools import chain
 
 import numpy
 import pyglet
@@ -24,43 +25,50 @@ pyglet.options['debug_gl'] = True
 
 from pyglet.gl import GL_AMBIENT_AND_DIFFUSE, glBegin, glClearColor, \
     glColor3f, GL_CULL_FACE, GL_DEPTH_TEST, GL_DIFFUSE, GL_EMISSION, \
-    glEnable, glEnd, GL_FILL, GLfloat, GL_FRONT_AND_BACK, GL_LIGHT0, \
+    glEnable, glEnd, GL_FILL, GL_FRONT_AND_BACK, GL_LIGHT0, \
     GL_LIGHT1, glLightfv, GL_LIGHTING, GL_LINE, glMaterialf, glMaterialfv, \
     glMultMatrixd, glNormal3f, glPolygonMode, glPopMatrix, GL_POSITION, \
     glPushMatrix, glRotatef, glScalef, glShadeModel, GL_SHININESS, \
     GL_SMOOTH, GL_SPECULAR, glTranslatef, GL_TRIANGLES, glVertex3f, \
-    glGetDoublev, GL_MODELVIEW_MATRIX, GLdouble, glClearDepth, glDepthFunc, \
+    glGetDoublev, GL_MODELVIEW_MATRIX, glClearDepth, glDepthFunc, \
     GL_LEQUAL, GL_BLEND, glBlendFunc, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA, \
-    GL_LINE_LOOP, glGetFloatv, GL_LINE_WIDTH, glLineWidth, glDisable, \
-    GL_LINE_SMOOTH
+    GL_LINE_LOOP, glLineWidth, glDisable, GL_LINE_SMOOTH, glPushAttrib, \
+    glPopAttrib, GL_LINE_BIT
 from pyglet import gl
 
 from .gl.panel import wxGLPanel
 from .gl.trackball import build_rotmatrix
 from .gl.libtatlin import actors
-
-def vec(*args):
-    return (GLfloat * len(args))(*args)
+from .gl.libtatlin.actors import vec
 
 class stlview:
     def __init__(self, facets, batch):
-        # Create the vertex and normal arrays.
-        vertices = []
-        normals = []
-
-        for i in facets:
-            for j in i[1]:
-                vertices.extend(j)
-                normals.extend(i[0])
-
-        # Create a list of triangle indices.
-        indices = list(range(3 * len(facets)))  # [[3*i, 3*i+1, 3*i+2] for i in xrange(len(facets))]
-        self.vertex_list = batch.add_indexed(len(vertices) // 3,
+        # Create the (vertex, normal) array: read each facet as its normal
+        # followed by its three vertices into a single flat array, then
+        # write the vertex and normal columns with one copy each
+        facet_data = numpy.fromiter(chain.from_iterable(chain(normal, *facet_vertices)
+                                                        for normal, facet_vertices in facets),
+                                    dtype = float, count = 12 * len(facets))
+        facet_data = facet_data.reshape(-1, 4, 3)
+        data = numpy.empty((len(facets), 3, 6))
+        data[:, :, :3] = facet_data[:, 1:]
+        data[:, :, 3:] = facet_data[:, :1]
+        data = data.reshape(-1, 6)
+
+        # Merge identical (vertex, normal) pairs, which adjacent coplanar
+        # facets share, and index into the smaller array. Keying on the
+        # normal as well keeps the flat shading of the facets intact.
+        data, indices = numpy.unique(data, axis = 0, return_inverse = True)
+        # pyglet interleaves static attributes, which can only be filled
+        # element by element from Python lists. Separate attribute buffers
+        # are plain ctypes arrays that numpy copies the data into directly.
+        self.vertex_list = batch.add_indexed(len(data),
                                              GL_TRIANGLES,
                                              None,  # group,
-                                             indices,
-                                             ('v3f/static', vertices),
-                                             ('n3f/static', normals))
+                                             indices.ravel().tolist(),
+                                             'v3f/dynamic', 'n3f/dynamic')
+        numpy.ctypeslib.as_array(self.vertex_list.vertices)[:] = data[:, :3].ravel()
+        numpy.ctypeslib.as_array(self.vertex_list.normals)[:] = data[:, 3:].ravel()
 
     def delete(self):
         self.vertex_list.delete()
@@ -69,6 +77,19 @@ class StlViewPanel(wxGLPanel):
 
     do_lights = False
 
+    # Unit square geometry shared by the mouse cursor and the cutting plane,
+    # which are scaled into place through the modelview matrix
+    quad_triangles = ((1, 1, 0), (0, 1, 0), (0, 0, 0),
+                      (1, 0, 0), (1, 1, 0), (0, 0, 0))
+    quad_outline = ((0, 0, 0), (0, 1, 0), (1, 1, 0), (1, 0, 0))
+
+    # Material colors set on every frame, converted to GL arrays only once
+    material_platform = vec(0.2, 0.2, 0.2, 1)
+    material_cursor = vec(1, 0, 0, 1)
+    material_objects = vec(0.3, 0.7, 0.5, 1)
+    material_cutting_plane = vec(0, 0.9, 0.15, 0.3)
+    material_cutting_outline = vec(0, 0.8, 0.15, 1)
+
     def __init__(self, parent, size,
                  build_dimensions = None, circular = False,
                  antialias_samples = 0,
@@ -283,7 +304,7 @@ class StlViewPanel(wxGLPanel):
         glPushMatrix()
         glTranslatef(0, 0, -self.dist)
         glMultMatrixd(build_rotmatrix(self.basequat))  # Rotate according to trackball
-        glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE, vec(0.2, 0.2, 0.2, 1))
+        glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE, self.material_platform)
         glTranslatef(- self.build_dimensions[3] - self.platform.width / 2,
                      - self.build_dimensions[4] - self.platform.depth / 2, 0)  # Move origin to bottom left of platform
         # Draw platform
@@ -298,23 +319,20 @@ class StlViewPanel(wxGLPanel):
                                     local_transform = False)
         if inter is not None:
             glPushMatrix()
-            glTranslatef(inter[0], inter[1], inter[2])
+            glTranslatef(inter[0] - 2, inter[1] - 2, inter[2])
+            glScalef(4, 4, 1)
             glBegin(GL_TRIANGLES)
-            glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE, vec(1, 0, 0, 1))
+            glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE, self.material_cursor)
             glNormal3f(0, 0, 1)
-            glVertex3f(2, 2, 0)
-            glVertex3f(-2, 2, 0)
-            glVertex3f(-2, -2, 0)
-            glVertex3f(2, -2, 0)
-            glVertex3f(2, 2, 0)
-            glVertex3f(-2, -2, 0)
+            for vertex in self.quad_triangles:
+                glVertex3f(*vertex)
             glEnd()
             glPopMatrix()
 
         # Draw objects
         glDisable(GL_CULL_FACE)
         glPushMatrix()
-        glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE, vec(0.3, 0.7, 0.5, 1))
+        glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE, self.material_objects)
         for i in self.parent.models:
             model = self.parent.models[i]
             glPushMatrix()
@@ -344,32 +362,25 @@ class StlViewPanel(wxGLPanel):
                     glTranslatef(0, 0, -dist)
                 elif axis == "z":
                     glTranslatef(0, 0, dist)
+                glScalef(plane_width, plane_height, 1)
                 glDisable(GL_CULL_FACE)
                 glBegin(GL_TRIANGLES)
-                glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE, vec(0, 0.9, 0.15, 0.3))
+                glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE, self.material_cutting_plane)
                 glNormal3f(0, 0, self.parent.cutting_direction)
-                glVertex3f(plane_width, plane_height, 0)
-                glVertex3f(0, plane_height, 0)
-                glVertex3f(0, 0, 0)
-                glVertex3f(plane_width, 0, 0)
-                glVertex3f(plane_width, plane_height, 0)
-                glVertex3f(0, 0, 0)
+                for vertex in self.quad_triangles:
+                    glVertex3f(*vertex)
                 glEnd()
                 glEnable(GL_CULL_FACE)
                 glPolygonMode(GL_FRONT_AND_BACK, GL_LINE)
+                glPushAttrib(GL_LINE_BIT)
                 glEnable(GL_LINE_SMOOTH)
-                orig_linewidth = (GLfloat)()
-                glGetFloatv(GL_LINE_WIDTH, orig_linewidth)
                 glLineWidth(4.0)
                 glBegin(GL_LINE_LOOP)
-                glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE, vec(0, 0.8, 0.15, 1))
-                glVertex3f(0, 0, 0)
-                glVertex3f(0, plane_height, 0)
-                glVertex3f(plane_width, plane_height, 0)
-                glVertex3f(plane_width, 0, 0)
+                glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE, self.material_cutting_outline)
+                for vertex in self.quad_outline:
+                    glVertex3f(*vertex)
                 glEnd()
-                glLineWidth(orig_linewidth)
-                glDisable(GL_LINE_SMOOTH)
+                glPopAttrib()
                 glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
                 glPopMatrix()
 
@@ -379,7 +390,7 @@ class StlViewPanel(wxGLPanel):
     # Utils
     # ==========================================================================
     def get_modelview_mat(self, local_transform):
-        mvmat = (GLdouble * 16)()
+        mvmat = self.modelview_mat
         if local_transform:
             glPushMatrix()
             # Rotate according to trackball
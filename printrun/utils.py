@@ -19,7 +19,9 @@ import sys
 import re
 import gettext
 import datetime
+import functools
 import subprocess
+import time
 import shlex
 import locale
 import logging
@@ -64,13 +66,13 @@ class LogFormatter(logging.Formatter):
         super().__init__(format_info)
         self.format_default = format_default
         self.format_info = format_info
+        self.info_formatter = logging.Formatter(format_info)
+        self.default_formatter = logging.Formatter(format_default)
 
     def format(self, record):
         if record.levelno == logging.INFO:
-            self._fmt = self.format_info
-        else:
-            self._fmt = self.format_default
-        return super().format(record)
+            return self.info_formatter.format(record)
+        return self.default_formatter.format(record)
 
 def setup_logging(out, filepath = None, reset_handlers = False):
     logger = logging.getLogger()
@@ -104,6 +106,11 @@ def iconfile(filename):
         return sys.executable
     return pixmapfile(filename)
 
+# Images and pixmaps ship with Printrun and do not move while it runs, so
+# their lookups are cached; configfile stays uncached as config files can
+# be created at runtime. Cached paths are made absolute so that they stay
+# valid after os.chdir (e.g. in projectlayer)
+@functools.lru_cache(maxsize = 512)
 def imagefile(filename):
     '''
     Get the full path to filename by checking standard image locations,
@@ -129,7 +136,7 @@ def imagefile(filename):
         # The file wasn't found in any known location, so use a relative
         #   path.
         path = os.path.join("images", filename)
-    return path
+    return os.path.abspath(path)
 
 def lookup_file(filename, prefixes):
     '''
@@ -147,6 +154,10 @@ def lookup_file(filename, prefixes):
     Returns:
     The full path if found, or filename if not found.
     '''
+    if os.path.isabs(filename):
+        # Joining any prefix with an absolute path yields the path itself,
+        # so every candidate below would be filename
+        return filename
     local_candidate = os.path.join(os.path.dirname(sys.argv[0]), filename)
     if os.path.exists(local_candidate):
         return local_candidate
@@ -158,6 +169,7 @@ def lookup_file(filename, prefixes):
             return candidate
     return filename
 
+@functools.lru_cache(maxsize = 512)
 def pixmapfile(filename):
     '''
     Get the full path to filename by checking in standard icon
@@ -171,7 +183,7 @@ def pixmapfile(filename):
         "pixmaps"
     )  # Used by pip install
     pixmaps_dirs = [shared_pixmaps_dir, local_pixmaps_dir]
-    return lookup_file(filename, pixmaps_dirs)
+    return os.path.abspath(lookup_file(filename, pixmaps_dirs))
 
 def sharedfile(filename):
     '''
@@ -196,10 +208,16 @@ def decode_utf8(s):
     return s
 
 def format_time(timestamp):
-    return datetime.datetime.fromtimestamp(timestamp).strftime("%H:%M:%S")
+    return time.strftime("%H:%M:%S", time.localtime(timestamp))
 
 def format_duration(delta):
-    return str(datetime.timedelta(seconds = int(delta)))
+    seconds = int(delta)
+    if not 0 <= seconds < 86400:
+        # Let timedelta spell out days and negative durations
+        return str(datetime.timedelta(seconds = seconds))
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
 
 def prepare_command(command, replaces = None):
     command = shlex.split(command.replace("\\", "\\\\"))
@@ -225,7 +243,7 @@ def get_command_output(command, replaces):
     return p.stdout.read()
 
 def dosify(name):
-    return os.path.split(name)[1].split(".")[0][:8] + ".g"
+    return os.path.basename(name).partition(".")[0][:8] + ".g"
 
 class RemainingTimeEstimator:
 
@@ -237,6 +255,9 @@ class RemainingTimeEstimator:
         self.previous_layers_estimate = 0
         self.current_layer_estimate = 0
         self.current_layer_lines = 0
+        self.line_fraction = 0
+        self.drift_layer_estimate = 0
+        self.drift_remaining_estimate = 0
         self.gcode = gcode
         self.last_idx = -1
         self.last_estimate = None
@@ -251,6 +272,11 @@ class RemainingTimeEstimator:
         self.current_layer_estimate = self.gcode.all_layers[layer].duration
         self.current_layer_lines = len(self.gcode.all_layers[layer])
         self.remaining_layers_estimate -= self.current_layer_estimate
+        # Per-layer factors, so each call only needs one multiply-add
+        if self.current_layer_lines:
+            self.line_fraction = 1.0 / self.current_layer_lines
+        self.drift_layer_estimate = self.drift * self.current_layer_estimate
+        self.drift_remaining_estimate = self.drift * self.remaining_layers_estimate
         self.last_idx = -1
         self.last_estimate = None
 
@@ -262,14 +288,14 @@ class RemainingTimeEstimator:
         if idx >= len(self.gcode.layer_idxs):
             return self.last_estimate
         layer, line = self.gcode.idxs(idx)
-        layer_progress = (1 - (float(line + 1) / self.current_layer_lines))
-        remaining = layer_progress * self.current_layer_estimate + self.remaining_layers_estimate
-        estimate = self.drift * remaining
+        layer_progress = 1 - (line + 1) * self.line_fraction
+        estimate = layer_progress * self.drift_layer_estimate + self.drift_remaining_estimate
         total = estimate + printtime
         self.last_idx = idx
         self.last_estimate = (estimate, total)
         return self.last_estimate
 
+build_dimensions_exp = re.compile(r"([-+]?[0-9]*\.?[0-9]*)")
 def parse_build_dimensions(bdim):
     # a string containing up to six numbers delimited by almost anything
     # first 0-3 numbers specify the build volume, no sign, always positive
@@ -278,7 +304,7 @@ def parse_build_dimensions(bdim):
     # "XXXxYYY+xxx-yyy"
     # "XXX,YYY,ZZZ+xxx+yyy-zzz"
     # etc
-    bdl = re.findall(r"([-+]?[0-9]*\.?[0-9]*)", bdim)
+    bdl = build_dimensions_exp.findall(bdim)
     defaults = [200, 200, 100, 0, 0, 0, 0, 0, 0]
     bdl = [b for b in bdl if b]
     bdl_float = [float(value) if value else defaults[i] for i, value in enumerate(bdl)]
@@ -326,11 +352,9 @@ def read_history_from(filename):
     history = []
     if os.path.exists(filename):
         with open(filename, 'r', encoding='utf-8') as _hf:
-            for i in _hf:
-                history.append(i.rstrip())
+            history = [i.rstrip() for i in _hf]
     return history
 
 def write_history_to(filename, hist):
     with open(filename, 'w', encoding='utf-8') as _hf:
-        for i in hist:
-            _hf.write(i + '\n')
+        _hf.writelines(i + '\n' for i in hist)
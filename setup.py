@@ -17,12 +17,15 @@
 
 import ast
 import glob
+import os
+import sys
 from setuptools import Extension, find_packages, setup
 
 
 def get_install_requires():
     with open('requirements.txt') as f:
-        install_requires = f.readlines()
+        return [line for line in f.read().splitlines()
+                if line and not line.startswith('#')]
 
 
 def get_version():
@@ -56,9 +59,16 @@ def get_data_files():
 
 
 def get_extensions():
+    extra_compile_args = []
+    if sys.platform != "win32":
+        extra_compile_args.append("-O3")
+        # Only for local builds, the binary will not run on older CPUs
+        if os.environ.get("PRINTRUN_NATIVE_BUILD"):
+            extra_compile_args.append("-march=native")
     extensions = [
         Extension(name="printrun.gcoder_line",
-                  sources=["printrun/gcoder_line.pyx"])
+                  sources=["printrun/gcoder_line.pyx"],
+                  extra_compile_args=extra_compile_args)
     ]
     return extensions
 